@@ -8,6 +8,10 @@ Usage:
     python main.py train [--config CONFIG] [--epochs N] [--batch-size N]
     python main.py evaluate CHECKPOINT [--n-samples N]
     python main.py compare CHECKPOINT [--n-puzzles N] [--llm-model MODEL]
+    python main.py serve CHECKPOINT [--port N] [--unix-socket PATH] [--max-batch-size N]
+    python main.py solve CHECKPOINT [--input FILE] [--output FILE] [--chunk-size N]
+    python main.py export CHECKPOINT [--output PATH] [--format torchscript|export|numpy]
+    python main.py autotune CHECKPOINT [--threads N,..] [--batch-sizes N,..] [--workers N,..]
     python main.py visualize [--history PATH] [--eval PATH] [--output-dir DIR]
     python main.py visualize-comparison [--comparison PATH] [--output-dir DIR]
     python main.py info
@@ -22,6 +26,19 @@ Examples:
     # Compare with LLM
     python main.py compare outputs/best.pt --n-puzzles 5 --llm-model llama3.2
 
+    # Serve the model over HTTP with micro-batching
+    python main.py serve outputs/best.pt --port 8080 --max-wait-ms 5
+
+    # Solve a large puzzle file in bounded memory
+    python main.py solve outputs/best.pt --input puzzles.txt --output solutions.txt
+
+    # Export a standalone inference artifact and solve with it
+    python main.py export outputs/best.pt --output outputs/best.ts
+    python main.py solve outputs/best.ts --input puzzles.txt
+
+    # Tune CPU threads/batch size/workers for this machine (used by evaluate/solve/serve)
+    python main.py autotune outputs/best.pt
+
     # Visualize training results
     python main.py visualize --history outputs/history.json --eval outputs/eval_results.json
 
@@ -69,6 +86,10 @@ def print_info():
     print("  python main.py train              - Train the model")
     print("  python main.py evaluate           - Evaluate trained model")
     print("  python main.py compare            - Compare with LLM")
+    print("  python main.py serve              - Serve model over HTTP")
+    print("  python main.py solve              - Solve a stream of puzzles")
+    print("  python main.py export             - Export a standalone inference artifact")
+    print("  python main.py autotune           - Tune CPU inference settings for this machine")
     print("  python main.py visualize          - Visualize training results")
     print("  python main.py visualize-comparison - Visualize TRM vs LLM comparison")
     print("  python main.py info               - Show this info")
@@ -79,7 +100,7 @@ def main():
     if len(sys.argv) < 2:
         print_info()
         print("\nUsage: python main.py <command> [options]")
-        print("Commands: train, evaluate, compare, visualize, visualize-comparison, info")
+        print("Commands: train, evaluate, compare, serve, solve, export, autotune, visualize, visualize-comparison, info")
         sys.exit(0)
 
     command = sys.argv[1].lower()
@@ -105,6 +126,30 @@ def main():
         from scripts.compare_llm import main as compare_main
         compare_main()
 
+    elif command == "serve":
+        # Pass remaining args to serve script
+        sys.argv = [sys.argv[0]] + sys.argv[2:]
+        from scripts.serve import main as serve_main
+        serve_main()
+
+    elif command == "solve":
+        # Pass remaining args to solve script
+        sys.argv = [sys.argv[0]] + sys.argv[2:]
+        from scripts.solve import main as solve_main
+        solve_main()
+
+    elif command == "export":
+        # Pass remaining args to export script
+        sys.argv = [sys.argv[0]] + sys.argv[2:]
+        from scripts.export import main as export_main
+        export_main()
+
+    elif command == "autotune":
+        # Pass remaining args to autotune script
+        sys.argv = [sys.argv[0]] + sys.argv[2:]
+        from scripts.autotune import main as autotune_main
+        autotune_main()
+
     elif command == "visualize":
         # Pass remaining args to visualize script
         sys.argv = [sys.argv[0]] + sys.argv[2:]
@@ -119,7 +164,7 @@ def main():
 
     else:
         print(f"Unknown command: {command}")
-        print("Available commands: train, evaluate, compare, visualize, visualize-comparison, info")
+        print("Available commands: train, evaluate, compare, serve, solve, export, autotune, visualize, visualize-comparison, info")
         sys.exit(1)
 
 
@@ -0,0 +1,250 @@
+"""Autotune CPU inference settings for this machine.
+
+Sweeps intra-op threads, inter-op threads, batch size and worker-process
+count for a checkpoint. Every configuration runs in fresh processes (thread
+pools can only be sized once per process); workers start together and
+solve random puzzles for a fixed time through the TRMInferenceEngine path.
+Configurations whose workers crash (e.g. out of memory at a large batch)
+or stall are recorded as failed and skipped. The configuration with the
+highest puzzles/sec (optionally subject to a p99 batch-latency limit) is
+saved to the per-machine tuning file, which evaluate, solve and serve read
+for any setting not given on the command line.
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.model.tuning import apply_threads, available_cores, machine_fingerprint, save_tuning
+
+
+def _benchmark_worker(
+    checkpoint: str,
+    settings: Dict,
+    max_steps: Optional[int],
+    duration: float,
+    barrier,
+    results,
+):
+    """Run one worker of a configuration and report its batch latencies.
+
+    Puts (latencies, puzzles, elapsed) on the results queue, or an error
+    message if anything fails (which also releases the other workers).
+    """
+    try:
+        apply_threads(settings["num_threads"], settings["num_interop_threads"])
+        from src.model.inference import TRMInferenceEngine
+
+        batch_size = settings["batch_size"]
+        engine = TRMInferenceEngine.from_checkpoint(
+            checkpoint, device="cpu", batch_size=batch_size, max_steps=max_steps
+        )
+        puzzles = np.random.default_rng().integers(0, 10, (batch_size, 81))
+        for _ in range(2):
+            engine.solve(puzzles)
+
+        barrier.wait()
+        latencies = []
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration or len(latencies) < 3:
+            batch_start = time.perf_counter()
+            engine.solve(puzzles)
+            latencies.append(time.perf_counter() - batch_start)
+        results.put((latencies, len(latencies) * batch_size, time.perf_counter() - start))
+    except Exception as e:
+        barrier.abort()
+        results.put(f"{type(e).__name__}: {e}")
+
+
+def benchmark(
+    checkpoint: str,
+    settings: Dict,
+    max_steps: Optional[int] = None,
+    duration: float = 3.0,
+    timeout: float = 600.0,
+) -> Dict:
+    """Measure one configuration.
+
+    Args:
+        checkpoint: Path to model checkpoint
+        settings: num_threads, num_interop_threads, batch_size, workers
+        max_steps: Deep recursion steps (default: T_deep from the checkpoint)
+        duration: Seconds each worker keeps solving
+        timeout: Seconds allowed for startup and for the timed run on top
+            of duration before the configuration counts as failed
+
+    Returns:
+        settings plus puzzles_per_sec, p50_ms and p99_ms, or settings plus
+        "failed" (the reason) if a worker crashed or stalled
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(settings["workers"], timeout=timeout)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_benchmark_worker,
+            args=(checkpoint, settings, max_steps, duration, barrier, results),
+        )
+        for _ in range(settings["workers"])
+    ]
+    for process in processes:
+        process.start()
+
+    worker_results, error = [], None
+    deadline = time.monotonic() + 2 * timeout + duration
+    while len(worker_results) < len(processes) and error is None:
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            # A worker killed outright (e.g. by the OOM killer) never reports
+            crashed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+            if crashed:
+                error = f"worker exited with code {crashed[0]}"
+            elif time.monotonic() > deadline:
+                error = "timed out"
+            continue
+        if isinstance(result, str):
+            error = result
+        else:
+            worker_results.append(result)
+
+    for process in processes:
+        if error is not None:
+            process.terminate()
+        process.join()
+    if error is not None:
+        return {**settings, "failed": error}
+
+    latencies = np.concatenate([r[0] for r in worker_results]) * 1000
+    puzzles = sum(r[1] for r in worker_results)
+    elapsed = max(r[2] for r in worker_results)
+    return {
+        **settings,
+        "puzzles_per_sec": puzzles / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def build_grid(
+    cores: int,
+    threads: Optional[List[int]],
+    interop: List[int],
+    batch_sizes: List[int],
+    workers: Optional[List[int]],
+) -> List[Dict]:
+    """Configurations to try; without explicit thread counts each worker
+    count gets cores // workers threads so every core is used."""
+    if workers is None:
+        workers = [w for w in (2 ** i for i in range(cores.bit_length())) if w <= cores]
+
+    grid = []
+    for n_workers in workers:
+        thread_counts = threads or [max(1, cores // n_workers)]
+        for n_threads in thread_counts:
+            if n_workers * n_threads > cores:
+                continue
+            for n_interop in interop:
+                for batch_size in batch_sizes:
+                    grid.append({
+                        "num_threads": n_threads,
+                        "num_interop_threads": n_interop,
+                        "batch_size": batch_size,
+                        "workers": n_workers,
+                    })
+    return grid
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autotune CPU inference settings for this machine")
+    parser.add_argument(
+        "checkpoint",
+        type=str,
+        help="Path to model checkpoint",
+    )
+    parser.add_argument("--threads", type=_int_list, default=None,
+                        help="Intra-op thread counts, e.g. 4,8,16 (default: cores/workers)")
+    parser.add_argument("--interop-threads", type=_int_list, default=[1, 2],
+                        help="Inter-op thread counts")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[64, 256, 1024],
+                        help="Batch sizes")
+    parser.add_argument("--workers", type=_int_list, default=None,
+                        help="Worker process counts (default: powers of two up to the core count)")
+    parser.add_argument("--duration", type=float, default=3.0,
+                        help="Seconds to benchmark each configuration")
+    parser.add_argument("--max-steps", type=int, default=None,
+                        help="Maximum deep recursion steps (default: T_deep from the checkpoint)")
+    parser.add_argument("--timeout", type=float, default=600.0,
+                        help="Seconds before a stalled configuration counts as failed")
+    parser.add_argument("--max-p99-ms", type=float, default=None,
+                        help="Only consider configurations whose p99 batch latency is below this")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Also save every measurement to this JSON file")
+    parser.add_argument("--no-save", action="store_true",
+                        help="Print the best configuration without saving it")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    grid = build_grid(cores, args.threads, args.interop_threads, args.batch_sizes, args.workers)
+    print(f"Machine: {machine_fingerprint()}")
+    print(f"Benchmarking {len(grid)} configurations, {args.duration:.0f}s each\n")
+
+    header = f"{'workers':>7} {'threads':>7} {'interop':>7} {'batch':>6} {'puzzles/s':>10} {'p50 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    measurements = []
+    for settings in grid:
+        result = benchmark(args.checkpoint, settings, args.max_steps, args.duration, args.timeout)
+        measurements.append(result)
+        row = (f"{result['workers']:>7} {result['num_threads']:>7} "
+               f"{result['num_interop_threads']:>7} {result['batch_size']:>6} ")
+        if "failed" in result:
+            print(row + f"failed: {result['failed']}")
+        else:
+            print(row + f"{result['puzzles_per_sec']:>10.1f} "
+                  f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(measurements, f, indent=2)
+
+    candidates = [
+        m for m in measurements
+        if "failed" not in m and (args.max_p99_ms is None or m["p99_ms"] <= args.max_p99_ms)
+    ]
+    if not candidates:
+        print("\nNo configuration succeeded" if args.max_p99_ms is None
+              else f"\nNo configuration meets p99 <= {args.max_p99_ms} ms")
+        sys.exit(1)
+
+    best = max(candidates, key=lambda m: m["puzzles_per_sec"])
+    best.update({
+        "checkpoint": str(Path(args.checkpoint).resolve()),
+        "tuned_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    print(f"\nBest: {best['workers']} worker(s) x {best['num_threads']} threads, "
+          f"interop {best['num_interop_threads']}, batch {best['batch_size']} "
+          f"-> {best['puzzles_per_sec']:.1f} puzzles/s (p99 {best['p99_ms']:.1f} ms)")
+
+    if not args.no_save:
+        path = save_tuning(best)
+        print(f"Saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
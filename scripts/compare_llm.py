@@ -14,49 +14,10 @@ from torch.utils.data import DataLoader
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.model.trm import TRM
+from src.model.inference import TRMInferenceEngine
 from src.data.dataset import SudokuDataset, puzzle_to_string
 from src.evaluation.llm_comparison import LLMComparator, compare_trm_vs_llm
 from src.evaluation.metrics import compute_metrics
-from src.training.ema import EMA
-
-
-def load_model(checkpoint_path: str, device: str = "cuda") -> TRM:
-    """Load model from checkpoint."""
-    checkpoint = torch.load(checkpoint_path, map_location=device)
-    config = checkpoint["config"]
-
-    model = TRM(
-        hidden_dim=config["hidden_dim"],
-        n_latent=config["n_latent"],
-        T_deep=config["T_deep"],
-        use_act=config["use_act"],
-    )
-    model.load_state_dict(checkpoint["model_state_dict"])
-    model.to(device)
-    model.eval()
-
-    # Load EMA weights if available
-    if "ema_state_dict" in checkpoint:
-        ema = EMA(model, decay=config["ema_decay"])
-        ema.load_state_dict(checkpoint["ema_state_dict"])
-        ema.apply_shadow()
-
-    return model
-
-
-@torch.no_grad()
-def get_trm_predictions(
-    model: TRM,
-    puzzles: np.ndarray,
-    device: str = "cuda",
-) -> np.ndarray:
-    """Get TRM predictions for puzzles."""
-    model.eval()
-    puzzles_tensor = torch.from_numpy(puzzles).long().to(device)
-    logits, _ = model(puzzles_tensor)
-    predictions = logits.argmax(dim=-1)
-    return predictions.cpu().numpy()
 
 
 def print_comparison_table(comparison: dict):
@@ -171,8 +132,8 @@ def main():
 
     # Load TRM model
     print("\nLoading TRM model...")
-    trm_model = load_model(args.checkpoint, device)
-    print(f"TRM parameters: {trm_model.count_parameters():,}")
+    trm_engine = TRMInferenceEngine.from_checkpoint(args.checkpoint, device=device)
+    print(f"TRM parameters: {trm_engine.model.count_parameters():,}")
 
     # Load test puzzles
     print("\nLoading test puzzles...")
@@ -182,6 +143,7 @@ def main():
         augmentations_per_sample=1,
         seed=42,  # Fixed seed for reproducibility
         dataset_name=config["data"]["dataset_name"],
+        cache_dir=config["data"].get("cache_dir"),
     )
 
     puzzles = np.array([test_dataset.get_raw(i)[0] for i in range(len(test_dataset.puzzles))])
@@ -189,7 +151,7 @@ def main():
 
     # Get TRM predictions
     print("\nGetting TRM predictions...")
-    trm_predictions = get_trm_predictions(trm_model, puzzles, device)
+    trm_predictions = trm_engine.solve(puzzles)
     trm_metrics = compute_metrics(trm_predictions, solutions, puzzles)
     print(f"TRM cell accuracy: {trm_metrics['cell_accuracy']:.2%}")
     print(f"TRM puzzle accuracy: {trm_metrics['puzzle_accuracy']:.2%}")
@@ -3,18 +3,18 @@
 import argparse
 import json
 import sys
+import time
 from pathlib import Path
 
 import numpy as np
 import torch
 import yaml
-from torch.utils.data import DataLoader
-from tqdm import tqdm
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.model.trm import TRM
+from src.model.inference import TRMInferenceEngine, solve_sharded
+from src.model.tuning import apply_threads, available_cores, resolve_settings
 from src.data.dataset import SudokuDataset, puzzle_to_string
 from src.evaluation.metrics import (
     compute_metrics,
@@ -22,67 +22,49 @@ from src.evaluation.metrics import (
     difficulty_analysis,
     errors_by_position,
 )
-from src.training.ema import EMA
+from src.evaluation.sweep import cheapest_meeting, format_sweep_table, sweep_recursion
 
 
-def load_model(checkpoint_path: str, device: str = "cuda") -> TRM:
-    """Load model from checkpoint."""
-    checkpoint = torch.load(checkpoint_path, map_location=device)
-    config = checkpoint["config"]
-
-    model = TRM(
-        hidden_dim=config["hidden_dim"],
-        n_latent=config["n_latent"],
-        T_deep=config["T_deep"],
-        use_act=config["use_act"],
-    )
-    model.load_state_dict(checkpoint["model_state_dict"])
-    model.to(device)
-    model.eval()
-
-    # Load EMA weights if available
-    if "ema_state_dict" in checkpoint:
-        ema = EMA(model, decay=config["ema_decay"])
-        ema.load_state_dict(checkpoint["ema_state_dict"])
-        ema.apply_shadow()  # Use EMA weights for evaluation
-
-    return model
-
-
-@torch.no_grad()
 def evaluate_model(
-    model: TRM,
-    test_loader: DataLoader,
-    device: str = "cuda",
+    engine: TRMInferenceEngine,
+    puzzles: np.ndarray,
+    solutions: np.ndarray,
 ) -> dict:
     """Evaluate model on test set.
 
+    Args:
+        engine: Inference engine wrapping the trained model (halting and
+            head options are configured on the engine)
+        puzzles: Shape (N, 81) test puzzles
+        solutions: Shape (N, 81) ground truth solutions
+
     Returns:
         Dict with metrics and predictions
     """
-    model.eval()
-
-    all_predictions = []
-    all_solutions = []
-    all_puzzles = []
+    predictions, steps = engine.solve(puzzles, return_steps=True, progress=True)
+    return evaluate_predictions(predictions, steps, puzzles, solutions)
 
-    for batch in tqdm(test_loader, desc="Evaluating"):
-        puzzles = batch["puzzle"].to(device)
-        solutions = batch["solution"].to(device)
 
-        logits, _ = model(puzzles)
-        predictions = logits.argmax(dim=-1)
-
-        all_predictions.append(predictions.cpu().numpy())
-        all_solutions.append(solutions.cpu().numpy())
-        all_puzzles.append(puzzles.cpu().numpy())
+def evaluate_predictions(
+    predictions: np.ndarray,
+    steps: np.ndarray,
+    puzzles: np.ndarray,
+    solutions: np.ndarray,
+) -> dict:
+    """Compute metrics for predictions on the full test set.
 
-    predictions = np.concatenate(all_predictions)
-    solutions = np.concatenate(all_solutions)
-    puzzles = np.concatenate(all_puzzles)
+    Args:
+        predictions: Shape (N, 81) model predictions (merged across shards)
+        steps: Shape (N,) deep steps used per puzzle
+        puzzles: Shape (N, 81) test puzzles
+        solutions: Shape (N, 81) ground truth solutions
 
+    Returns:
+        Dict with metrics and predictions
+    """
     # Compute metrics
     metrics = compute_metrics(predictions, solutions, puzzles)
+    metrics["mean_deep_steps"] = float(steps.mean())
 
     # Difficulty analysis
     difficulty = difficulty_analysis(predictions, solutions, puzzles)
@@ -100,6 +82,55 @@ def evaluate_model(
     }
 
 
+def compare_quantized(
+    fp32_results: dict,
+    engine: TRMInferenceEngine,
+    quantized_engine: TRMInferenceEngine,
+    puzzles: np.ndarray,
+    solutions: np.ndarray,
+) -> dict:
+    """Compare int8 quantized inference against fp32 on the same puzzles.
+
+    Args:
+        fp32_results: Output of evaluate_model for the fp32 engine
+        engine: fp32 inference engine (used for timing)
+        quantized_engine: Engine with int8 dynamic-quantized layers
+        puzzles: Shape (N, 81) test puzzles
+        solutions: Shape (N, 81) ground truth solutions
+
+    Returns:
+        Dict with int8 metrics, per-metric deltas (int8 - fp32), prediction
+        agreement and throughput of both engines
+    """
+    timings = {}
+    for name, eng in (("fp32", engine), ("int8", quantized_engine)):
+        eng.warmup()
+        start = time.perf_counter()
+        predictions = eng.solve(puzzles)
+        timings[name] = time.perf_counter() - start
+        if name == "int8":
+            quantized_predictions = predictions
+
+    fp32_metrics = fp32_results["metrics"]
+    int8_metrics = compute_metrics(quantized_predictions, solutions, puzzles)
+    deltas = {
+        key: float(int8_metrics[key] - fp32_metrics[key])
+        for key in int8_metrics
+        if key in fp32_metrics and isinstance(int8_metrics[key], (int, float))
+    }
+
+    return {
+        "metrics": int8_metrics,
+        "delta": deltas,
+        "prediction_agreement": float(
+            (quantized_predictions == fp32_results["predictions"]).mean()
+        ),
+        "fp32_puzzles_per_sec": len(puzzles) / timings["fp32"],
+        "int8_puzzles_per_sec": len(puzzles) / timings["int8"],
+        "speedup": timings["fp32"] / timings["int8"],
+    }
+
+
 def print_example_predictions(
     predictions: np.ndarray,
     solutions: np.ndarray,
@@ -141,6 +172,52 @@ def print_example_predictions(
         print(f"Errors at positions: {list(zip(*error_positions))}")
 
 
+def run_sweep(engine: TRMInferenceEngine, dataset: SudokuDataset, batch_size: int, args):
+    """Run the (n_latent, T) sweep, print the Pareto table and save it."""
+    print(f"\nSweeping n_latent={args.sweep_latent} x T={args.sweep_steps} "
+          f"on {len(dataset)} puzzles...")
+    results = sweep_recursion(
+        engine.model,
+        dataset.puzzles,
+        dataset.solutions,
+        args.sweep_latent,
+        args.sweep_steps,
+        batch_size=batch_size,
+    )
+
+    print("\n" + "=" * 60)
+    print("Accuracy vs Compute (F/L: Pareto-optimal in FLOPs/latency)")
+    print("=" * 60)
+    print(format_sweep_table(results, batch_size=min(batch_size, len(dataset))))
+
+    cheapest = None
+    if args.target_accuracy is not None:
+        cheapest = cheapest_meeting(results, args.target_accuracy)
+        if cheapest is None:
+            print(f"\nNo setting reaches {args.target_accuracy:.2%} puzzle accuracy")
+        else:
+            print(f"\nCheapest setting with puzzle accuracy >= {args.target_accuracy:.2%}: "
+                  f"n_latent={cheapest['n_latent']}, T={cheapest['T']} "
+                  f"({cheapest['puzzle_accuracy']:.2%}, {cheapest['latency_ms']:.2f} ms/batch)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sweep": results, "cheapest": cheapest}, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+
+def load_engine(checkpoint: str, engine_kwargs: dict) -> TRMInferenceEngine:
+    """Load the in-process inference engine."""
+    print(f"\nLoading model from: {checkpoint}")
+    engine = TRMInferenceEngine.from_checkpoint(checkpoint, **engine_kwargs)
+    print(f"Model parameters: {engine.model.count_parameters():,}")
+    return engine
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",")]
+
+
 def main():
     parser = argparse.ArgumentParser(description="Evaluate TRM model")
     parser.add_argument(
@@ -163,8 +240,8 @@ def main():
     parser.add_argument(
         "--batch-size",
         type=int,
-        default=512,
-        help="Batch size for evaluation",
+        default=None,
+        help="Batch size for evaluation (default: autotuned value, else 512)",
     )
     parser.add_argument(
         "--output",
@@ -172,6 +249,86 @@ def main():
         default=None,
         help="Path to save results JSON",
     )
+    parser.add_argument(
+        "--halt-threshold",
+        type=float,
+        default=None,
+        help="Stop recursing a puzzle once its ACT halting probability reaches this value",
+    )
+    parser.add_argument(
+        "--converge-steps",
+        type=int,
+        default=None,
+        help="Stop recursing a puzzle once its prediction is unchanged for this many deep steps",
+    )
+    parser.add_argument(
+        "--converge-margin",
+        type=float,
+        default=0.0,
+        help="Minimum per-cell confidence margin required for convergence halting",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Maximum deep recursion steps (default: T_deep from the checkpoint)",
+    )
+    parser.add_argument(
+        "--preserve-givens",
+        action="store_true",
+        help="Copy given cells into the predictions instead of decoding them",
+    )
+    parser.add_argument(
+        "--fused-swiglu",
+        action="store_true",
+        help="Run SwiGLU gate/up projections as a single fused GEMM",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="torch.compile the recursive block (padded to static batch buckets, cached across runs)",
+    )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Also evaluate with int8 dynamic quantization (CPU) and report the delta vs fp32",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Split the test set across this many CPU processes "
+             "(default: autotuned value, else 1)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="torch intra-op threads per process (default: autotuned value, else cores/workers)",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Sweep latent recursions x deep steps and print an accuracy/latency/FLOPs Pareto table",
+    )
+    parser.add_argument(
+        "--sweep-latent",
+        type=_int_list,
+        default=[1, 2, 4, 6, 8],
+        help="Latent recursions per deep step to sweep",
+    )
+    parser.add_argument(
+        "--sweep-steps",
+        type=_int_list,
+        default=[1, 2, 3, 4, 6],
+        help="Deep steps to sweep",
+    )
+    parser.add_argument(
+        "--target-accuracy",
+        type=float,
+        default=None,
+        help="With --sweep, report the cheapest setting reaching this puzzle accuracy",
+    )
     parser.add_argument(
         "--show-examples",
         action="store_true",
@@ -184,12 +341,41 @@ def main():
         config = yaml.safe_load(f)
 
     device = config["device"] if torch.cuda.is_available() else "cpu"
+    if args.quantize or (args.workers or 1) > 1:
+        device = "cpu"
     print(f"Using device: {device}")
 
-    # Load model
-    print(f"\nLoading model from: {args.checkpoint}")
-    model = load_model(args.checkpoint, device)
-    print(f"Model parameters: {model.count_parameters():,}")
+    # Autotuned CPU settings fill in whatever the command line leaves unset
+    settings = resolve_settings(
+        {
+            "batch_size": args.batch_size,
+            "workers": args.workers,
+            "num_threads": args.threads,
+            "num_interop_threads": None,
+        },
+        {"batch_size": 512, "workers": 1},
+        use_tuning=device == "cpu",
+    )
+    workers = settings["workers"]
+    if workers == 1:
+        apply_threads(settings["num_threads"], settings["num_interop_threads"])
+
+    engine_kwargs = dict(
+        device=device,
+        batch_size=settings["batch_size"],
+        fused_swiglu=args.fused_swiglu or None,
+        max_steps=args.max_steps,
+        halt_threshold=args.halt_threshold,
+        converge_steps=args.converge_steps,
+        converge_margin=args.converge_margin,
+        preserve_givens=args.preserve_givens,
+        compile=args.compile,
+    )
+
+    # Load model (sharded runs load one copy per worker instead)
+    engine = None
+    if workers == 1 or args.sweep:
+        engine = load_engine(args.checkpoint, engine_kwargs)
 
     # Load test data
     print("\nLoading test data...")
@@ -198,18 +384,30 @@ def main():
         n_samples=args.n_samples,
         augmentations_per_sample=1,
         dataset_name=config["data"]["dataset_name"],
+        cache_dir=config["data"].get("cache_dir"),
     )
 
-    test_loader = DataLoader(
-        test_dataset,
-        batch_size=args.batch_size,
-        shuffle=False,
-        num_workers=config["data"]["num_workers"],
-    )
+    if args.sweep:
+        run_sweep(engine, test_dataset, settings["batch_size"], args)
+        return
 
     # Evaluate
     print(f"\nEvaluating on {len(test_dataset)} puzzles...")
-    results = evaluate_model(model, test_loader, device)
+    if workers > 1:
+        threads = settings["num_threads"] or max(1, available_cores() // workers)
+        print(f"Sharding across {workers} worker processes ({threads} threads each)")
+        worker_kwargs = {k: v for k, v in engine_kwargs.items() if k != "device"}
+        predictions, steps = solve_sharded(
+            args.checkpoint, test_dataset.puzzles, workers,
+            threads_per_worker=threads,
+            interop_threads=settings["num_interop_threads"],
+            **worker_kwargs,
+        )
+        results = evaluate_predictions(
+            predictions, steps, test_dataset.puzzles, test_dataset.solutions
+        )
+    else:
+        results = evaluate_model(engine, test_dataset.puzzles, test_dataset.solutions)
 
     # Print results
     print("\n" + "=" * 60)
@@ -217,6 +415,25 @@ def main():
     print("=" * 60)
     print(format_metrics(results["metrics"]))
 
+    quantization = None
+    if args.quantize:
+        print("\nComparing int8 dynamic quantization against fp32...")
+        if engine is None:
+            engine = load_engine(args.checkpoint, engine_kwargs)
+        quantized_engine = TRMInferenceEngine.from_checkpoint(
+            args.checkpoint, quantize=True, **engine_kwargs
+        )
+        quantization = compare_quantized(
+            results, engine, quantized_engine, test_dataset.puzzles, test_dataset.solutions
+        )
+        print("\n--- int8 Quantization ---")
+        for key, delta in quantization["delta"].items():
+            print(f"{key}: {quantization['metrics'][key]:.4f} ({delta:+.4f} vs fp32)")
+        print(f"Prediction agreement: {quantization['prediction_agreement']:.2%}")
+        print(f"Throughput: {quantization['fp32_puzzles_per_sec']:.1f} -> "
+              f"{quantization['int8_puzzles_per_sec']:.1f} puzzles/s "
+              f"({quantization['speedup']:.2f}x)")
+
     print("\n--- Difficulty Analysis ---")
     for difficulty, acc in results["difficulty"].items():
         if acc is not None:
@@ -237,6 +454,8 @@ def main():
             "difficulty": results["difficulty"],
             "error_positions": results["error_positions"],
         }
+        if quantization is not None:
+            output_data["quantization"] = quantization
         with open(args.output, "w") as f:
             json.dump(output_data, f, indent=2)
         print(f"\nResults saved to: {args.output}")
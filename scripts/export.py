@@ -0,0 +1,116 @@
+"""Export a trained TRM checkpoint as a standalone inference artifact.
+
+The artifact has EMA weights baked in and a fixed number of deep steps, and
+loads with torch alone (no src.training, optimizer or scheduler state).
+Pass it to `solve` or `serve` in place of a checkpoint. The numpy format
+writes plain weights for the torch-free runtime, usable with `solve`.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.model.inference import load_checkpoint_model
+from src.model.export import EXPORT_FORMATS, export_model, load_exported
+from src.model.numpy_runtime import NumpyTRM
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export TRM for inference")
+    parser.add_argument(
+        "checkpoint",
+        type=str,
+        help="Path to model checkpoint",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Artifact path (default: next to the checkpoint, .ts, .pt2 or .npz)",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="torchscript",
+        choices=sorted(EXPORT_FORMATS),
+        help="torchscript (jit.trace), export (torch.export, dynamic batch size) "
+             "or numpy (weights for the pure-NumPy runtime)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Deep recursion steps baked into the artifact (default: T_deep from the checkpoint)",
+    )
+    parser.add_argument(
+        "--fused-swiglu",
+        action="store_true",
+        help="Export SwiGLU gate/up projections as a single fused GEMM",
+    )
+    parser.add_argument(
+        "--no-ema",
+        action="store_true",
+        help="Export the raw model weights instead of the EMA weights",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="cpu",
+        help="Device to trace on",
+    )
+    args = parser.parse_args()
+
+    output = args.output or str(Path(args.checkpoint).with_suffix(EXPORT_FORMATS[args.format]))
+
+    print(f"Loading model from: {args.checkpoint}")
+    model = load_checkpoint_model(
+        args.checkpoint,
+        args.device,
+        fused_swiglu=args.fused_swiglu or None,
+        use_ema=not args.no_ema,
+    )
+
+    print(f"Exporting ({args.format}) to: {output}")
+    export_model(
+        model,
+        output,
+        fmt=args.format,
+        T=args.max_steps,
+        metadata={"checkpoint": os.path.basename(args.checkpoint), "ema": not args.no_ema},
+    )
+
+    # Check the artifact reproduces the model
+    puzzles = torch.randint(0, 10, (64, 81), device=args.device)
+    start = time.perf_counter()
+    if args.format == "numpy":
+        runtime = NumpyTRM.load(output)
+        load_time = time.perf_counter() - start
+        steps = runtime.T
+        predictions = torch.from_numpy(runtime.solve(puzzles.cpu().numpy())).to(args.device)
+    else:
+        module, metadata = load_exported(output, args.device)
+        load_time = time.perf_counter() - start
+        steps = metadata["T"]
+        with torch.no_grad():
+            predictions = module(puzzles)
+
+    with torch.no_grad():
+        expected = model(puzzles, max_steps=steps)[0].argmax(dim=-1)
+    agreement = (predictions == expected).float().mean().item()
+
+    print(f"Deep steps: {steps}")
+    print(f"Artifact size: {os.path.getsize(output) / 2**20:.1f} MiB "
+          f"(checkpoint: {os.path.getsize(args.checkpoint) / 2**20:.1f} MiB)")
+    print(f"Load time: {load_time * 1000:.0f} ms")
+    print(f"Agreement with checkpoint model: {agreement:.2%}")
+
+
+if __name__ == "__main__":
+    main()
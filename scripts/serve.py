@@ -0,0 +1,380 @@
+"""Local HTTP inference server for TRM with asyncio micro-batching.
+
+Concurrent requests are queued and coalesced into batches of up to
+--max-batch-size puzzles, waiting at most --max-wait-ms for a batch to
+fill, then solved with a single forward pass and fanned back out.
+
+Endpoints (HTTP/1.1 over TCP and/or a Unix socket):
+    POST /solve   body: JSON {"puzzles": [...]} or one 81-char puzzle per line
+                  returns: {"solutions": [...]}
+    GET  /stats   queue depth and batch-size histogram
+    GET  /health  liveness check
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import torch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.model.inference import TRMInferenceEngine
+from src.model.export import is_exported_artifact
+from src.model.tuning import apply_threads, resolve_settings
+from src.data.puzzles import parse_puzzle_strings, puzzles_to_strings
+
+
+class MicroBatcher:
+    """Coalesces concurrent solve requests into batched forward passes."""
+
+    def __init__(
+        self,
+        engine: TRMInferenceEngine,
+        max_batch_size: int = 256,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            engine: Inference engine used for every batch
+            max_batch_size: Puzzles per forward pass before flushing early
+            max_wait_ms: Longest time the first queued request waits for company
+        """
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Single worker thread: one forward pass in flight, event loop stays free
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # Stats
+        self.batch_size_hist = Counter()
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.puzzles = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+
+    async def solve(self, puzzles: np.ndarray) -> np.ndarray:
+        """Queue puzzles for the next batch and wait for their predictions."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((puzzles, future))
+        self.requests += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        """Wait for one request, then gather more until full or timed out."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    async def run(self):
+        """Batching loop; runs until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            puzzles = np.concatenate([p for p, _ in batch])
+
+            start = time.perf_counter()
+            try:
+                predictions = await loop.run_in_executor(
+                    self.executor, self.engine.solve, puzzles
+                )
+            except Exception as e:  # Fail every request in the batch, keep serving
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.busy_seconds += time.perf_counter() - start
+
+            self.batches += 1
+            self.puzzles += len(puzzles)
+            self.batch_size_hist[_histogram_bucket(len(puzzles))] += 1
+
+            # Fan results back out in request order
+            offset = 0
+            for request_puzzles, future in batch:
+                n = len(request_puzzles)
+                if not future.done():
+                    future.set_result(predictions[offset:offset + n])
+                offset += n
+
+    def stats(self) -> Dict:
+        """Current queue depth and batch statistics."""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "puzzles": self.puzzles,
+            "batches": self.batches,
+            "mean_batch_size": self.puzzles / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                label: self.batch_size_hist[label]
+                for label in sorted(self.batch_size_hist, key=lambda s: int(s.split("-")[0]))
+            },
+            "busy_seconds": self.busy_seconds,
+        }
+
+
+def _histogram_bucket(size: int) -> str:
+    """Power-of-two histogram bucket label, e.g. 5 -> '5-8'."""
+    upper = 1
+    while upper < size:
+        upper *= 2
+    lower = upper // 2 + 1 if upper > 1 else 1
+    return f"{lower}-{upper}"
+
+
+def _parse_request_body(body: bytes, content_type: str) -> np.ndarray:
+    """Extract puzzles from a JSON or newline-separated text body."""
+    if "json" in content_type:
+        payload = json.loads(body)
+        strings = payload["puzzles"] if isinstance(payload, dict) else payload
+    else:
+        strings = [line for line in body.decode("ascii").splitlines() if line.strip()]
+    return parse_puzzle_strings(strings)
+
+
+async def _write_response(writer: asyncio.StreamWriter, status: str, payload: Dict, keep_alive: bool):
+    body = json.dumps(payload).encode()
+    headers = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(headers.encode() + body)
+    await writer.drain()
+
+
+def make_handler(batcher: MicroBatcher):
+    """Create a connection handler speaking minimal HTTP/1.1."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _write_response(writer, "400 Bad Request", {"error": "malformed request"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    and version.upper() == "HTTP/1.1"
+                )
+
+                if method == "GET" and path == "/health":
+                    await _write_response(writer, "200 OK", {"status": "ok"}, keep_alive)
+                elif method == "GET" and path == "/stats":
+                    await _write_response(writer, "200 OK", batcher.stats(), keep_alive)
+                elif method == "POST" and path == "/solve":
+                    try:
+                        puzzles = _parse_request_body(body, headers.get("content-type", ""))
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        await _write_response(writer, "400 Bad Request", {"error": str(e)}, keep_alive)
+                    else:
+                        predictions = await batcher.solve(puzzles)
+                        await _write_response(
+                            writer, "200 OK", {"solutions": puzzles_to_strings(predictions)}, keep_alive
+                        )
+                else:
+                    await _write_response(writer, "404 Not Found", {"error": f"no route {method} {path}"}, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(
+    engine: TRMInferenceEngine,
+    host: str,
+    port: int,
+    unix_socket: str = None,
+    max_batch_size: int = 256,
+    max_wait_ms: float = 5.0,
+    stats_interval: float = 60.0,
+):
+    """Run the HTTP server(s) and the batching loop until interrupted."""
+    batcher = MicroBatcher(engine, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    handler = make_handler(batcher)
+
+    servers = []
+    if port:
+        servers.append(await asyncio.start_server(handler, host, port))
+        print(f"Listening on http://{host}:{port}")
+    if unix_socket:
+        servers.append(await asyncio.start_unix_server(handler, path=unix_socket))
+        print(f"Listening on unix socket {unix_socket}")
+    if not servers:
+        raise ValueError("Nothing to listen on: set --port and/or --unix-socket")
+
+    batch_task = asyncio.create_task(batcher.run())
+    try:
+        while True:
+            await asyncio.sleep(stats_interval)
+            stats = batcher.stats()
+            print(f"queue_depth={stats['queue_depth']} (max {stats['max_queue_depth']}), "
+                  f"batches={stats['batches']}, mean_batch={stats['mean_batch_size']:.1f}, "
+                  f"histogram={stats['batch_size_histogram']}")
+    finally:
+        batch_task.cancel()
+        for server in servers:
+            server.close()
+        print(f"Final stats: {json.dumps(batcher.stats())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve TRM over HTTP with micro-batching")
+    parser.add_argument(
+        "checkpoint",
+        type=str,
+        help="Path to model checkpoint or exported artifact (.ts/.pt2)",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="cpu",
+        help="Device to run inference on",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="TCP host to bind")
+    parser.add_argument("--port", type=int, default=8080, help="TCP port (0 to disable)")
+    parser.add_argument("--unix-socket", type=str, default=None, help="Also listen on this Unix socket path")
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=None,
+        help="Maximum puzzles coalesced into one forward pass (default: autotuned batch size, else 256)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="torch intra-op threads (default: autotuned value, else torch's default)",
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=5.0,
+        help="Maximum time a request waits for a batch to fill",
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between queue/batch statistics log lines",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="torch.compile the recursive block (padded to static batch buckets, cached across runs)",
+    )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Run the recursive block with int8 dynamic quantization (CPU only)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Maximum deep recursion steps (default: T_deep from the checkpoint)",
+    )
+    parser.add_argument(
+        "--halt-threshold",
+        type=float,
+        default=None,
+        help="Stop recursing a puzzle once its ACT halting probability reaches this value",
+    )
+    args = parser.parse_args()
+
+    device = args.device
+    if device == "cuda" and not torch.cuda.is_available():
+        device = "cpu"
+
+    # Autotuned CPU settings fill in whatever the command line leaves unset
+    settings = resolve_settings(
+        {"batch_size": args.max_batch_size, "num_threads": args.threads, "num_interop_threads": None},
+        {"batch_size": 256},
+        use_tuning=device == "cpu",
+    )
+    args.max_batch_size = settings["batch_size"]
+    apply_threads(settings["num_threads"], settings["num_interop_threads"])
+
+    print(f"Loading model from: {args.checkpoint}")
+    if is_exported_artifact(args.checkpoint):
+        if args.quantize or args.compile or args.max_steps is not None or args.halt_threshold is not None:
+            parser.error("--quantize, --compile, --max-steps and --halt-threshold need a checkpoint, not an exported artifact")
+        engine = TRMInferenceEngine.from_export(args.checkpoint, device=device, batch_size=args.max_batch_size)
+        print(f"Exported artifact, {engine.exported_steps} deep steps (device: {device})")
+    else:
+        engine = TRMInferenceEngine.from_checkpoint(
+            args.checkpoint,
+            device=device,
+            batch_size=args.max_batch_size,
+            quantize=args.quantize,
+            compile=args.compile,
+            max_steps=args.max_steps,
+            halt_threshold=args.halt_threshold,
+        )
+        print(f"Model parameters: {engine.model.count_parameters():,} (device: {device})")
+    if args.compile:
+        print(f"Compiling for batch buckets {engine.buckets}...")
+        engine.warmup()
+
+    try:
+        asyncio.run(serve(
+            engine,
+            host=args.host,
+            port=args.port,
+            unix_socket=args.unix_socket,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            stats_interval=args.stats_interval,
+        ))
+    except KeyboardInterrupt:
+        print("\nShutting down")
+
+
+if __name__ == "__main__":
+    main()
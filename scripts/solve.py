@@ -0,0 +1,186 @@
+"""Stream puzzles through TRM and write solutions as they are produced.
+
+Reads one 81-character puzzle per line ('.' or 0 for empty cells) from a
+file or stdin in fixed-size chunks, so memory stays bounded no matter how
+many lines the input has. Blank lines are skipped.
+
+Given NumPy weights (.npz, from `export --format numpy`) the pure-NumPy
+runtime is used and torch is never imported.
+"""
+
+import argparse
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, TextIO
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# torch is imported only when a torch model is loaded (see load_engine)
+from src.data.puzzles import parse_puzzle_strings, puzzles_to_strings
+from src.model.tuning import apply_threads, resolve_settings
+
+
+def read_chunks(stream: TextIO, chunk_size: int) -> Iterator[np.ndarray]:
+    """Yield (n, 81) puzzle arrays of at most chunk_size lines each."""
+    line_number = 0
+    while True:
+        lines = list(islice(stream, chunk_size))
+        if not lines:
+            return
+        puzzles = [line for line in lines if line.strip()]
+        try:
+            parsed = parse_puzzle_strings(puzzles)
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid puzzle in lines {line_number + 1}-{line_number + len(lines)}: {e}"
+            ) from e
+        line_number += len(lines)
+        yield parsed
+
+
+def load_engine(args, parser: argparse.ArgumentParser, settings: dict):
+    """Build the solver for a checkpoint, torch artifact or NumPy weights."""
+    torch_only = args.quantize or args.compile or args.halt_threshold is not None
+    if args.checkpoint.endswith(".npz"):
+        if torch_only:
+            parser.error("--quantize, --compile and --halt-threshold need a torch checkpoint")
+        from src.model.numpy_runtime import NumpyTRM
+        return NumpyTRM.load(args.checkpoint, batch_size=args.batch_size, max_steps=args.max_steps)
+
+    apply_threads(settings["num_threads"], settings["num_interop_threads"])
+    import torch
+    from src.model.inference import TRMInferenceEngine
+    from src.model.export import is_exported_artifact
+
+    device = args.device
+    if device == "cuda" and not torch.cuda.is_available():
+        device = "cpu"
+
+    if is_exported_artifact(args.checkpoint):
+        if torch_only or args.max_steps is not None:
+            parser.error("--quantize, --compile, --max-steps and --halt-threshold need a checkpoint, not an exported artifact")
+        return TRMInferenceEngine.from_export(args.checkpoint, device=device, batch_size=args.batch_size)
+
+    return TRMInferenceEngine.from_checkpoint(
+        args.checkpoint,
+        device=device,
+        batch_size=args.batch_size,
+        quantize=args.quantize,
+        compile=args.compile,
+        max_steps=args.max_steps,
+        halt_threshold=args.halt_threshold,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a stream of Sudoku puzzles with TRM")
+    parser.add_argument(
+        "checkpoint",
+        type=str,
+        help="Path to model checkpoint, exported artifact (.ts/.pt2) or NumPy weights (.npz)",
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        default="-",
+        help="Puzzle file, one puzzle per line (default: stdin)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="-",
+        help="Solution file (default: stdout)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=65536,
+        help="Lines read and written per chunk",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Puzzles per forward pass (default: autotuned value, else 512)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="torch intra-op threads (default: autotuned value, else torch's default)",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="cpu",
+        help="Device to run inference on",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="torch.compile the recursive block (padded to static batch buckets, cached across runs)",
+    )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Run the recursive block with int8 dynamic quantization (CPU only)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Maximum deep recursion steps (default: T_deep from the checkpoint)",
+    )
+    parser.add_argument(
+        "--halt-threshold",
+        type=float,
+        default=None,
+        help="Stop recursing a puzzle once its ACT halting probability reaches this value",
+    )
+    args = parser.parse_args()
+
+    # Progress goes to stderr so stdout can carry solutions
+    log = sys.stderr
+    print(f"Loading model from: {args.checkpoint}", file=log)
+    settings = resolve_settings(
+        {"batch_size": args.batch_size, "num_threads": args.threads, "num_interop_threads": None},
+        {"batch_size": 512},
+        use_tuning=args.device == "cpu",
+    )
+    args.batch_size = settings["batch_size"]
+    engine = load_engine(args, parser, settings)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    start = time.time()
+    n_solved = 0
+    try:
+        for predictions in engine.iter_solve(read_chunks(source, args.chunk_size)):
+            if len(predictions):
+                sink.write("\n".join(puzzles_to_strings(predictions)))
+                sink.write("\n")
+            n_solved += len(predictions)
+            elapsed = time.time() - start
+            print(f"\rSolved {n_solved:,} puzzles ({n_solved / max(elapsed, 1e-9):,.0f}/s)", end="", file=log)
+    except ValueError as e:
+        print(f"\nError: {e}", file=log)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+        else:
+            sink.flush()
+
+    print(f"\nDone: {n_solved:,} puzzles in {time.time() - start:.1f}s", file=log)
+
+
+if __name__ == "__main__":
+    main()
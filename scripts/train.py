@@ -46,6 +46,7 @@ def main():
         n_latent=config["model"]["n_latent"],
         T_deep=config["model"]["T_deep"],
         use_act=config["model"]["use_act"],
+        fused_swiglu=config["model"].get("fused_swiglu", False),
         # Training
         epochs=args.epochs or config["training"]["epochs"],
         batch_size=args.batch_size or config["training"]["batch_size"],
@@ -53,6 +54,14 @@ def main():
         weight_decay=config["training"]["weight_decay"],
         warmup_steps=config["training"]["warmup_steps"],
         max_grad_norm=config["training"]["max_grad_norm"],
+        loss_on_empty_cells=config["training"].get("loss_on_empty_cells", False),
+        # Truncated backprop
+        no_grad_deep_steps=config["training"].get("no_grad_deep_steps", 0),
+        no_grad_latent_steps=config["training"].get("no_grad_latent_steps", 0),
+        # Activation checkpointing
+        activation_checkpointing=config["training"].get("activation_checkpointing", False),
+        checkpoint_granularity=config["training"].get("checkpoint_granularity", "latent"),
+        compile=config["training"].get("compile", False),
         # Early stopping
         early_stopping=config["training"].get("early_stopping", True),
         early_stopping_patience=config["training"].get("early_stopping_patience", 15),
@@ -66,6 +75,8 @@ def main():
         # Data
         train_samples=config["training"]["train_samples"],
         augmentations_per_sample=config["training"]["augmentations_per_sample"],
+        augment_on_batch=config["training"].get("augment_on_batch", False),
+        augment_seed=config["data"]["seed"],
         # Logging
         log_interval=config["logging"]["log_interval"],
         eval_interval=config["logging"]["eval_interval"],
@@ -85,7 +96,8 @@ def main():
     print(f"Learning rate: {train_config.learning_rate}")
     print(f"Weight decay: {train_config.weight_decay}")
     print(f"Training samples: {train_config.train_samples}")
-    print(f"Augmentations per sample: {train_config.augmentations_per_sample}")
+    print(f"Augmentations per sample: {train_config.augmentations_per_sample}"
+          + (" (on-batch)" if train_config.augment_on_batch else ""))
     if train_config.early_stopping:
         print(f"Early stopping: patience={train_config.early_stopping_patience}, "
               f"min_delta={train_config.early_stopping_min_delta}")
@@ -101,6 +113,8 @@ def main():
         num_workers=config["data"]["num_workers"],
         seed=config["data"]["seed"],
         dataset_name=config["data"]["dataset_name"],
+        augment_on_batch=train_config.augment_on_batch,
+        cache_dir=config["data"].get("cache_dir"),
     )
 
     # Create model
@@ -110,6 +124,7 @@ def main():
         n_latent=train_config.n_latent,
         T_deep=train_config.T_deep,
         use_act=train_config.use_act,
+        fused_swiglu=train_config.fused_swiglu,
     )
     print(f"Model parameters: {model.count_parameters():,}")
 
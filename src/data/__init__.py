@@ -1,6 +1,20 @@
-"""Data loading and augmentation for Sudoku puzzles."""
+"""Data loading and augmentation for Sudoku puzzles.
 
-from .augmentation import SudokuAugmentor
-from .dataset import SudokuDataset
+Names are imported from their submodules on first access, so torch-free
+modules such as ``src.data.puzzles`` can be imported without loading torch.
+"""
 
-__all__ = ["SudokuAugmentor", "SudokuDataset"]
+import importlib
+
+_EXPORTS = {
+    "SudokuAugmentor": ".augmentation",
+    "SudokuDataset": ".dataset",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,7 +5,77 @@ new training examples from existing ones.
 """
 
 import numpy as np
-from typing import Tuple
+from typing import Sequence, Tuple
+
+from .philox import item_uniforms
+
+# Uniforms consumed per sampled transform by transforms_from_uniforms:
+# transpose flag, band order, rows within each band (3), stack order,
+# columns within each stack (3), digit relabeling (9)
+N_TRANSFORM_UNIFORMS = 18
+
+# The 6 permutations of 3 elements, picked by a single uniform each
+_PERMUTATIONS_3 = np.array([
+    [0, 1, 2], [0, 2, 1], [1, 0, 2], [1, 2, 0], [2, 0, 1], [2, 1, 0],
+])
+
+
+def transforms_from_uniforms(uniforms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Map uniform random numbers to uniformly distributed Sudoku symmetries.
+
+    Every validity-preserving transform is a permutation of the 81 cells
+    (band/stack orders, rows/columns within them and an optional transpose;
+    rotations and reflections are compositions of these) followed by a
+    relabeling of the digits. Each permutation of 3 is picked by one
+    uniform and the digit permutation is the argsort of 9, so every group
+    element is equally likely.
+
+    Args:
+        uniforms: Shape (N, N_TRANSFORM_UNIFORMS) floats in [0, 1)
+
+    Returns:
+        (indices, digit_maps): indices of shape (N, 81) where output cell i
+        takes input cell indices[:, i]; digit_maps of shape (N, 10) mapping
+        each digit to its new label (0 stays 0)
+    """
+    n = uniforms.shape[0]
+    perm3 = _PERMUTATIONS_3[(uniforms[:, 1:9] * 6).astype(np.intp)]  # (N, 8, 3)
+    transpose = uniforms[:, 0] < 0.5
+    bands, rows = perm3[:, 0], perm3[:, 1:4]
+    stacks, cols = perm3[:, 4], perm3[:, 5:8]
+    digits = np.argsort(uniforms[:, 9:18], axis=1) + 1
+
+    # Source row/column of each output row/column: 3 * band + row in band
+    row_source = (3 * bands[:, :, None] + rows).reshape(n, 9)
+    col_source = (3 * stacks[:, :, None] + cols).reshape(n, 9)
+
+    indices = row_source[:, :, None] * 9 + col_source[:, None, :]  # (N, 9, 9)
+    indices = np.where(transpose[:, None, None], indices.transpose(0, 2, 1), indices)
+
+    digit_maps = np.zeros((n, 10), dtype=np.int64)
+    digit_maps[:, 1:] = digits
+    return indices.reshape(n, 81), digit_maps
+
+
+def apply_transforms(
+    grids: np.ndarray,
+    indices: np.ndarray,
+    digit_maps: np.ndarray,
+) -> np.ndarray:
+    """Apply per-row cell permutations and digit maps to a batch of grids.
+
+    Args:
+        grids: Shape (N, 81) with values 0-9
+        indices: Shape (N, 81) from transforms_from_uniforms
+        digit_maps: Shape (N, 10) from transforms_from_uniforms
+
+    Returns:
+        Shape (N, 81) transformed grids, same dtype as ``grids``
+    """
+    # Flat gathers: row r's cells start at 81 * r, its digit map at 10 * r
+    rows = np.arange(len(grids))[:, None]
+    permuted = np.take(grids, indices + rows * 81)
+    return np.take(digit_maps, permuted + rows * 10).astype(grids.dtype, copy=False)
 
 
 class SudokuAugmentor:
@@ -24,10 +94,13 @@ class SudokuAugmentor:
 
     def __init__(self, seed: int = None):
         self.rng = np.random.default_rng(seed)
+        # Key of the counter-based per-item stream used by augment_indexed
+        self.seed = seed if seed is not None else int(self.rng.integers(2**63))
 
     def set_seed(self, seed: int):
-        """Reset random state with new seed."""
+        """Reset random state with new seed (both the rng and the per-item stream key)."""
         self.rng = np.random.default_rng(seed)
+        self.seed = seed if seed is not None else int(self.rng.integers(2**63))
 
     def augment(
         self,
@@ -67,6 +140,67 @@ class SudokuAugmentor:
 
         return puzzle.flatten(), solution.flatten()
 
+    def sample_transforms(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sample n uniformly random Sudoku symmetries.
+
+        Returns:
+            (indices, digit_maps) of shapes (n, 81) and (n, 10), see
+            transforms_from_uniforms
+        """
+        return transforms_from_uniforms(self.rng.random((n, N_TRANSFORM_UNIFORMS)))
+
+    def augment_arrays(
+        self,
+        puzzles: np.ndarray,
+        solutions: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply an independent random symmetry to each puzzle-solution pair.
+
+        Vectorized: one cell gather and one digit-map gather for the whole
+        batch, with no per-puzzle Python work.
+
+        Args:
+            puzzles: Shape (N, 81) with values 0-9 (0 = empty)
+            solutions: Shape (N, 81) with values 1-9
+
+        Returns:
+            Augmented (puzzles, solutions), each of shape (N, 81)
+        """
+        indices, digit_maps = self.sample_transforms(len(puzzles))
+        return (
+            apply_transforms(puzzles, indices, digit_maps),
+            apply_transforms(solutions, indices, digit_maps),
+        )
+
+    def augment_indexed(
+        self,
+        puzzles: np.ndarray,
+        solutions: np.ndarray,
+        item_indices: Sequence[int],
+        epoch: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Augment items deterministically from their dataset indices.
+
+        The symmetry applied to each row depends only on (seed, epoch,
+        index), via Philox counters, so results do not depend on batching,
+        worker assignment or the augmentor's Generator state.
+
+        Args:
+            puzzles: Shape (N, 81) with values 0-9 (0 = empty)
+            solutions: Shape (N, 81) with values 1-9
+            item_indices: Shape (N,) dataset index of each row
+            epoch: Epoch counter
+
+        Returns:
+            Augmented (puzzles, solutions), each of shape (N, 81)
+        """
+        uniforms = item_uniforms(self.seed, epoch, item_indices, N_TRANSFORM_UNIFORMS)
+        indices, digit_maps = transforms_from_uniforms(uniforms)
+        return (
+            apply_transforms(puzzles, indices, digit_maps),
+            apply_transforms(solutions, indices, digit_maps),
+        )
+
     def augment_batch(
         self,
         puzzles: np.ndarray,
@@ -81,18 +215,13 @@ class SudokuAugmentor:
             n_augmentations: Number of augmented versions per puzzle
 
         Returns:
-            Augmented arrays with shape (N * n_augmentations, 81)
+            Augmented arrays with shape (N * n_augmentations, 81), the
+            versions of each puzzle adjacent
         """
-        all_puzzles = []
-        all_solutions = []
-
-        for puzzle, solution in zip(puzzles, solutions):
-            for _ in range(n_augmentations):
-                aug_puzzle, aug_solution = self.augment(puzzle, solution)
-                all_puzzles.append(aug_puzzle)
-                all_solutions.append(aug_solution)
-
-        return np.array(all_puzzles), np.array(all_solutions)
+        return self.augment_arrays(
+            np.repeat(puzzles, n_augmentations, axis=0),
+            np.repeat(solutions, n_augmentations, axis=0),
+        )
 
     def _permute_rows_in_bands(
         self,
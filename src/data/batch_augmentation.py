@@ -0,0 +1,82 @@
+"""Torch-side Sudoku augmentation of whole batches on the training device.
+
+The same symmetry group as ``augmentation.transforms_from_uniforms``, sampled
+with a torch Generator and applied with two gathers, so raw base puzzles can
+be augmented right before the forward pass. DataLoader workers then only
+index arrays and every step still sees fresh augmentations.
+"""
+
+from typing import Optional, Tuple, Union
+
+import torch
+
+from .augmentation import N_TRANSFORM_UNIFORMS, _PERMUTATIONS_3
+
+
+def transforms_from_uniforms_torch(uniforms: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Torch version of ``augmentation.transforms_from_uniforms``.
+
+    Args:
+        uniforms: Shape (N, N_TRANSFORM_UNIFORMS) floats in [0, 1)
+
+    Returns:
+        (indices, digit_maps) of shapes (N, 81) and (N, 10), int64
+    """
+    n = uniforms.shape[0]
+    perm3 = torch.as_tensor(_PERMUTATIONS_3, device=uniforms.device)[
+        (uniforms[:, 1:9] * 6).long()
+    ]  # (N, 8, 3)
+    transpose = uniforms[:, 0] < 0.5
+    row_source = (3 * perm3[:, 0, :, None] + perm3[:, 1:4]).reshape(n, 9)
+    col_source = (3 * perm3[:, 4, :, None] + perm3[:, 5:8]).reshape(n, 9)
+
+    indices = row_source[:, :, None] * 9 + col_source[:, None, :]  # (N, 9, 9)
+    indices = torch.where(transpose[:, None, None], indices.transpose(1, 2), indices)
+
+    digit_maps = torch.zeros(n, 10, dtype=torch.long, device=uniforms.device)
+    digit_maps[:, 1:] = uniforms[:, 9:18].argsort(dim=1) + 1
+    return indices.reshape(n, 81), digit_maps
+
+
+class TorchBatchAugmentor:
+    """Applies an independent random Sudoku symmetry to every row of a batch.
+
+    Usage:
+        augmentor = TorchBatchAugmentor(seed=42, device="cuda")
+        puzzles, solutions = augmentor(puzzles, solutions)  # (B, 81) each
+    """
+
+    def __init__(self, seed: Optional[int] = None, device: Union[str, torch.device] = "cpu"):
+        self.device = torch.device(device)
+        self.generator = torch.Generator(device=self.device)
+        if seed is None:
+            self.generator.seed()
+        else:
+            self.generator.manual_seed(seed)
+
+    def sample_transforms(self, n: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Sample n uniformly random symmetries as (indices, digit_maps)."""
+        uniforms = torch.rand(
+            n, N_TRANSFORM_UNIFORMS, generator=self.generator, device=self.device
+        )
+        return transforms_from_uniforms_torch(uniforms)
+
+    def __call__(
+        self,
+        puzzles: torch.Tensor,
+        solutions: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Augment a batch.
+
+        Args:
+            puzzles: Shape (B, 81) with values 0-9, on the augmentor's device
+            solutions: Shape (B, 81) with values 1-9
+
+        Returns:
+            Augmented (puzzles, solutions), int64
+        """
+        indices, digit_maps = self.sample_transforms(puzzles.shape[0])
+        return (
+            digit_maps.gather(1, puzzles.long().gather(1, indices)),
+            digit_maps.gather(1, solutions.long().gather(1, indices)),
+        )
@@ -0,0 +1,148 @@
+"""Local cache of parsed Sudoku datasets as memory-mapped uint8 arrays.
+
+Each (dataset_name, split, n_samples, seed) selection is stored once as
+``puzzles.npy`` and ``solutions.npy`` (uint8, shape (N, 81)) plus a
+``manifest.json`` recording the selection and a SHA-256 of the array
+contents (computed at write time; pass ``verify=True`` to check it).
+Later runs map the arrays instead of downloading and parsing the dataset
+again, so training hosts without network access only need a populated
+cache directory (copy it over, or run once where the dataset is
+reachable).
+
+NumPy only.
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+CACHE_VERSION = 1
+
+
+def cache_entry_dir(
+    cache_dir: str,
+    dataset_name: str,
+    split: str,
+    n_samples: Optional[int],
+    seed: int,
+) -> Path:
+    """Directory holding one cached selection of a dataset."""
+    dataset_dir = re.sub(r"[^A-Za-z0-9._-]+", "--", dataset_name)
+    size = "all" if n_samples is None else f"n{n_samples}"
+    return Path(cache_dir).expanduser() / dataset_dir / f"{split}-{size}-seed{seed}"
+
+
+def content_hash(puzzles: np.ndarray, solutions: np.ndarray) -> str:
+    """SHA-256 of the puzzle and solution bytes."""
+    digest = hashlib.sha256()
+    for array in (puzzles, solutions):
+        digest.update(np.ascontiguousarray(array, dtype=np.uint8).data)
+    return digest.hexdigest()
+
+
+def save_cached(
+    cache_dir: str,
+    dataset_name: str,
+    split: str,
+    n_samples: Optional[int],
+    seed: int,
+    puzzles: np.ndarray,
+    solutions: np.ndarray,
+) -> Path:
+    """Store parsed arrays; the manifest is written last, marking the entry complete.
+
+    Args:
+        cache_dir: Cache root
+        dataset_name: HuggingFace dataset identifier
+        split: Split name as requested from SudokuDataset
+        n_samples: Number of base samples selected (None = whole split)
+        seed: Seed of the subsampling
+        puzzles: Shape (N, 81) with values 0-9
+        solutions: Shape (N, 81) with values 1-9
+
+    Returns:
+        Entry directory
+    """
+    entry = cache_entry_dir(cache_dir, dataset_name, split, n_samples, seed)
+    entry.mkdir(parents=True, exist_ok=True)
+
+    puzzles = np.ascontiguousarray(puzzles, dtype=np.uint8)
+    solutions = np.ascontiguousarray(solutions, dtype=np.uint8)
+    for name, array in (("puzzles", puzzles), ("solutions", solutions)):
+        tmp_path = entry / f"{name}.npy.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, entry / f"{name}.npy")
+
+    manifest = {
+        "version": CACHE_VERSION,
+        "dataset_name": dataset_name,
+        "split": split,
+        "n_samples": n_samples,
+        "seed": seed,
+        "n_puzzles": len(puzzles),
+        "sha256": content_hash(puzzles, solutions),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp_path = entry / (MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, entry / MANIFEST_FILE)
+    return entry
+
+
+def load_cached(
+    cache_dir: str,
+    dataset_name: str,
+    split: str,
+    n_samples: Optional[int],
+    seed: int,
+    verify: bool = False,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Map cached arrays, or return None if the selection is not cached.
+
+    Args:
+        cache_dir: Cache root
+        dataset_name: HuggingFace dataset identifier
+        split: Split name as requested from SudokuDataset
+        n_samples: Number of base samples selected (None = whole split)
+        seed: Seed of the subsampling
+        verify: Also check the arrays against the manifest's content hash
+            (reads every byte; by default only shapes and file sizes are
+            checked, so loading touches no array pages)
+
+    Returns:
+        (puzzles, solutions) as uint8 memory maps, or None
+    """
+    entry = cache_entry_dir(cache_dir, dataset_name, split, n_samples, seed)
+    manifest_path = entry / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != CACHE_VERSION:
+        return None
+
+    # Copy-on-write maps: pages are shared and never written back, but the
+    # arrays stay writable for consumers such as torch.from_numpy
+    puzzles = np.load(entry / "puzzles.npy", mmap_mode="c")
+    solutions = np.load(entry / "solutions.npy", mmap_mode="c")
+    for array in (puzzles, solutions):
+        # A truncated file fails in np.load; also catch trailing garbage
+        expected_size = array.offset + array.nbytes
+        if (
+            array.shape != (manifest["n_puzzles"], 81)
+            or array.dtype != np.uint8
+            or os.path.getsize(array.filename) != expected_size
+        ):
+            raise ValueError(f"Dataset cache entry {entry} does not match its manifest; delete it")
+    if verify and content_hash(puzzles, solutions) != manifest["sha256"]:
+        raise ValueError(f"Dataset cache entry {entry} failed its content hash check; delete it")
+    return puzzles, solutions
@@ -3,17 +3,20 @@
 import numpy as np
 import torch
 from torch.utils.data import Dataset, DataLoader
-from typing import Tuple, Optional, Dict, Any
-from datasets import load_dataset
+from typing import Tuple, Optional, Dict, Any, Sequence
 
 from .augmentation import SudokuAugmentor
+from .cache import load_cached, save_cached
+from .puzzles import parse_puzzle_strings
 
 
 class SudokuDataset(Dataset):
     """PyTorch Dataset for Sudoku puzzles.
 
     Loads puzzles from HuggingFace datasets and applies augmentation on-the-fly.
-    Uses the 'sudoku-extreme' or similar datasets.
+    Uses the 'sudoku-extreme' or similar datasets. With a cache_dir, parsed
+    puzzles are memory-mapped from the local cache when present (no network
+    access) and stored there after the first load.
     """
 
     def __init__(
@@ -23,6 +26,8 @@ class SudokuDataset(Dataset):
         augmentations_per_sample: int = 1,
         seed: int = 42,
         dataset_name: str = "Ritvik19/Sudoku-Dataset",
+        augment: bool = True,
+        cache_dir: Optional[str] = None,
     ):
         """Initialize the dataset.
 
@@ -32,11 +37,48 @@ class SudokuDataset(Dataset):
             augmentations_per_sample: Number of augmented versions per epoch
             seed: Random seed for reproducibility
             dataset_name: HuggingFace dataset identifier
+            augment: Augment items here; False returns base puzzles (still
+                augmentations_per_sample times per epoch) for a trainer that
+                augments whole batches on the device
+            cache_dir: Parsed-dataset cache directory (None = no cache)
         """
         self.split = split
         self.augmentations_per_sample = augmentations_per_sample
+        self.augment = augment
         self.augmentor = SudokuAugmentor(seed=seed)
 
+        cached = None
+        if cache_dir is not None:
+            cached = load_cached(cache_dir, dataset_name, split, n_samples, seed)
+
+        if cached is not None:
+            self.puzzles, self.solutions = cached
+            print(f"Loaded {len(self.puzzles)} puzzles from cache ({cache_dir})")
+        else:
+            self.puzzles, self.solutions = self._load_from_hub(
+                dataset_name, split, n_samples, seed
+            )
+            if cache_dir is not None:
+                entry = save_cached(
+                    cache_dir, dataset_name, split, n_samples, seed, self.puzzles, self.solutions
+                )
+                print(f"Cached parsed puzzles in {entry}")
+            print(f"Loaded {len(self.puzzles)} puzzles")
+
+    @staticmethod
+    def _load_from_hub(
+        dataset_name: str,
+        split: str,
+        n_samples: Optional[int],
+        seed: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Download (or read the HuggingFace cache), parse and subsample.
+
+        Returns:
+            (puzzles, solutions) uint8 arrays of shape (N, 81)
+        """
+        from datasets import load_dataset
+
         # Map common split names
         hf_split = "validation" if split == "test" else split
 
@@ -58,45 +100,21 @@ class SudokuDataset(Dataset):
             print(f"Slice loading failed, loading full {hf_split} split...")
             dataset = load_dataset(dataset_name, split=hf_split)
 
-        # Convert to numpy arrays efficiently
+        # Parse whole columns at once (limited to 2x n_samples if specified)
         print("Parsing puzzles...")
-        puzzles = []
-        solutions = []
-
-        # Limit iteration if n_samples specified
         max_items = n_samples * 2 if n_samples else len(dataset)
-        for i, item in enumerate(dataset):
-            if i >= max_items:
-                break
-            puzzle = self._parse_puzzle_string(item["puzzle"])
-            solution = self._parse_puzzle_string(item["solution"])
-            puzzles.append(puzzle)
-            solutions.append(solution)
-
-        self.puzzles = np.array(puzzles)
-        self.solutions = np.array(solutions)
+        rows = dataset[:max_items]
+        puzzles = parse_puzzle_strings(rows["puzzle"])
+        solutions = parse_puzzle_strings(rows["solution"])
 
         # Shuffle and subsample with fixed seed
-        if n_samples is not None and n_samples < len(self.puzzles):
+        if n_samples is not None and n_samples < len(puzzles):
             rng = np.random.default_rng(seed)
-            indices = rng.permutation(len(self.puzzles))[:n_samples]
-            self.puzzles = self.puzzles[indices]
-            self.solutions = self.solutions[indices]
-
-        print(f"Loaded {len(self.puzzles)} puzzles")
-
-    def _parse_puzzle_string(self, s: str) -> np.ndarray:
-        """Convert 81-character string to numpy array.
+            indices = rng.permutation(len(puzzles))[:n_samples]
+            puzzles = puzzles[indices]
+            solutions = solutions[indices]
 
-        Args:
-            s: String of 81 digits (0-9, where 0 or '.' means empty)
-
-        Returns:
-            Shape (81,) array with values 0-9
-        """
-        # Handle different formats
-        s = s.replace(".", "0").replace(" ", "").replace("\n", "")
-        return np.array([int(c) for c in s], dtype=np.int64)
+        return puzzles, solutions
 
     def __len__(self) -> int:
         """Return total samples including augmentations."""
@@ -111,21 +129,34 @@ class SudokuDataset(Dataset):
         Returns:
             Dict with 'puzzle' and 'solution' tensors of shape (81,)
         """
-        # Map augmented index to base index
-        base_idx = idx % len(self.puzzles)
-        aug_idx = idx // len(self.puzzles)
+        batch = self.__getitems__([idx])
+        return {key: value[0] for key, value in batch.items()}
+
+    def __getitems__(self, indices: Sequence[int]) -> Dict[str, torch.Tensor]:
+        """Get a whole batch with one gather and one bulk augmentation.
 
-        puzzle = self.puzzles[base_idx].copy()
-        solution = self.solutions[base_idx].copy()
+        DataLoader calls this with the sampler's batch of indices instead of
+        calling __getitem__ per item; pair it with ``collate_batch``.
+
+        Args:
+            indices: Indices into the dataset
+
+        Returns:
+            Dict with 'puzzle' and 'solution' tensors of shape (B, 81)
+        """
+        # Map augmented indices to base indices
+        indices = np.asarray(indices, dtype=np.int64)
+        base_indices = indices % len(self.puzzles)
+        puzzles = self.puzzles[base_indices]
+        solutions = self.solutions[base_indices]
 
-        # Apply augmentation (different seed per augmentation index)
-        if self.augmentations_per_sample > 1:
-            self.augmentor.set_seed(idx)
-            puzzle, solution = self.augmentor.augment(puzzle, solution)
+        # Apply augmentation (keyed on the dataset seed and item index)
+        if self.augment and self.augmentations_per_sample > 1:
+            puzzles, solutions = self.augmentor.augment_indexed(puzzles, solutions, indices)
 
         return {
-            "puzzle": torch.from_numpy(puzzle).long(),
-            "solution": torch.from_numpy(solution).long(),
+            "puzzle": torch.from_numpy(puzzles).long(),
+            "solution": torch.from_numpy(solutions).long(),
         }
 
     def get_raw(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
@@ -158,19 +189,32 @@ class InfiniteSudokuDataset(Dataset):
         return len(self.puzzles)
 
     def __getitem__(self, idx: int) -> Dict[str, torch.Tensor]:
-        puzzle = self.puzzles[idx].copy()
-        solution = self.solutions[idx].copy()
+        batch = self.__getitems__([idx])
+        return {key: value[0] for key, value in batch.items()}
+
+    def __getitems__(self, indices: Sequence[int]) -> Dict[str, torch.Tensor]:
+        """Batched fetch, see SudokuDataset.__getitems__."""
+        indices = np.asarray(indices, dtype=np.int64)
 
         # Different augmentation each epoch
-        self.augmentor.set_seed(self.epoch * len(self.puzzles) + idx)
-        puzzle, solution = self.augmentor.augment(puzzle, solution)
+        puzzles, solutions = self.augmentor.augment_indexed(
+            self.puzzles[indices], self.solutions[indices], indices, epoch=self.epoch
+        )
 
         return {
-            "puzzle": torch.from_numpy(puzzle).long(),
-            "solution": torch.from_numpy(solution).long(),
+            "puzzle": torch.from_numpy(puzzles).long(),
+            "solution": torch.from_numpy(solutions).long(),
         }
 
 
+def collate_batch(batch: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """DataLoader collate_fn for datasets with __getitems__.
+
+    The batch arrives already stacked, so there is nothing to collate.
+    """
+    return batch
+
+
 def create_dataloaders(
     train_samples: int = 1000,
     test_samples: int = 1000,
@@ -179,6 +223,8 @@ def create_dataloaders(
     num_workers: int = 4,
     seed: int = 42,
     dataset_name: str = "Ritvik19/Sudoku-Dataset",
+    augment_on_batch: bool = False,
+    cache_dir: Optional[str] = None,
 ) -> Tuple[DataLoader, DataLoader]:
     """Create train and test dataloaders.
 
@@ -190,6 +236,9 @@ def create_dataloaders(
         num_workers: Number of data loading workers
         seed: Random seed
         dataset_name: HuggingFace dataset name
+        augment_on_batch: The trainer augments batches itself, so the train
+            set returns base puzzles
+        cache_dir: Parsed-dataset cache directory (None = no cache)
 
     Returns:
         (train_loader, test_loader)
@@ -200,6 +249,8 @@ def create_dataloaders(
         augmentations_per_sample=augmentations_per_sample,
         seed=seed,
         dataset_name=dataset_name,
+        augment=not augment_on_batch,
+        cache_dir=cache_dir,
     )
 
     test_dataset = SudokuDataset(
@@ -208,6 +259,7 @@ def create_dataloaders(
         augmentations_per_sample=1,  # No augmentation for test
         seed=seed + 1,  # Different seed for test
         dataset_name=dataset_name,
+        cache_dir=cache_dir,
     )
 
     train_loader = DataLoader(
@@ -217,6 +269,7 @@ def create_dataloaders(
         num_workers=num_workers,
         pin_memory=True,
         drop_last=True,
+        collate_fn=collate_batch,
     )
 
     test_loader = DataLoader(
@@ -225,6 +278,7 @@ def create_dataloaders(
         shuffle=False,
         num_workers=num_workers,
         pin_memory=True,
+        collate_fn=collate_batch,
     )
 
     return train_loader, test_loader
@@ -250,3 +304,4 @@ def puzzle_to_string(puzzle: np.ndarray) -> str:
 def puzzle_to_flat_string(puzzle: np.ndarray) -> str:
     """Convert puzzle array to 81-character string."""
     return "".join(str(int(x)) for x in puzzle.flatten())
+
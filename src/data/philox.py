@@ -0,0 +1,74 @@
+"""Counter-based random numbers (Philox4x32-10) in vectorized NumPy.
+
+The random stream of each dataset item is a pure function of
+(seed, epoch, index), so augmentations are reproducible regardless of
+worker count or iteration order, and the uniforms for a whole batch of
+indices come from one vectorized call instead of one Generator per item.
+
+Matches the Random123 reference implementation of Philox4x32-10.
+NumPy only.
+"""
+
+import numpy as np
+
+_M0 = 0xD2511F53
+_M1 = 0xCD9E8D57
+_W0 = 0x9E3779B9
+_W1 = 0xBB67AE85
+_MASK32 = 0xFFFFFFFF
+
+
+def philox4x32(counters: np.ndarray, key: np.ndarray, rounds: int = 10) -> np.ndarray:
+    """Apply the Philox4x32 bijection to many counters under one key.
+
+    Args:
+        counters: Shape (N, 4) uint32 counters
+        key: Shape (2,) uint32 key
+        rounds: Number of rounds (10 is the standard, crush-resistant choice)
+
+    Returns:
+        Shape (N, 4) uint32 random words
+    """
+    # 32x32-bit products fit in uint64; the key schedule stays in Python ints
+    c0, c1, c2, c3 = np.asarray(counters, dtype=np.uint32).T.astype(np.uint64)
+    k0, k1 = (int(k) for k in np.asarray(key, dtype=np.uint32))
+    for _ in range(rounds):
+        p0 = c0 * _M0
+        p1 = c2 * _M1
+        c0, c1, c2, c3 = (
+            (p1 >> 32) ^ c1 ^ k0,
+            p1 & _MASK32,
+            (p0 >> 32) ^ c3 ^ k1,
+            p0 & _MASK32,
+        )
+        k0 = (k0 + _W0) & _MASK32
+        k1 = (k1 + _W1) & _MASK32
+    return np.stack([c0, c1, c2, c3], axis=1).astype(np.uint32)
+
+
+def item_uniforms(seed: int, epoch: int, indices: np.ndarray, n: int) -> np.ndarray:
+    """Uniform floats in [0, 1) for each item, keyed on (seed, epoch, index).
+
+    Item ``i`` always gets the same n numbers for the same seed and epoch,
+    whatever batch it is computed in.
+
+    Args:
+        seed: Key of the stream (up to 64 bits)
+        epoch: Epoch counter (up to 32 bits)
+        indices: Shape (N,) non-negative item indices (up to 64 bits)
+        n: Uniforms per item
+
+    Returns:
+        Shape (N, n) float64
+    """
+    indices = np.asarray(indices, dtype=np.uint64).reshape(-1)
+    blocks = -(-n // 4)
+    counters = np.empty((len(indices), blocks, 4), dtype=np.uint32)
+    counters[:, :, 0] = (indices & _MASK32)[:, None]
+    counters[:, :, 1] = (indices >> 32)[:, None]
+    counters[:, :, 2] = epoch
+    counters[:, :, 3] = np.arange(blocks, dtype=np.uint32)
+
+    key = np.array([seed & 0xFFFFFFFF, (seed >> 32) & 0xFFFFFFFF], dtype=np.uint32)
+    words = philox4x32(counters.reshape(-1, 4), key).reshape(len(indices), blocks * 4)
+    return words[:, :n] * 2.0 ** -32
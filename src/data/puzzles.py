@@ -0,0 +1,35 @@
+"""Conversion between puzzle strings and arrays.
+
+NumPy only, so inference workers can parse and format puzzles without
+importing torch or the datasets library.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def parse_puzzle_strings(strings: Sequence[str]) -> np.ndarray:
+    """Parse many 81-character puzzle strings at once.
+
+    Args:
+        strings: Puzzle strings of digits 0-9, where 0 or '.' means empty
+
+    Returns:
+        Shape (N, 81) uint8 array with values 0-9
+    """
+    cleaned = [s.strip().replace(".", "0") for s in strings]
+    for i, s in enumerate(cleaned):
+        if len(s) != 81:
+            raise ValueError(f"Puzzle {i} has {len(s)} cells, expected 81")
+    grid = np.frombuffer("".join(cleaned).encode("ascii"), dtype=np.uint8).reshape(-1, 81)
+    grid = grid - ord("0")
+    if (grid > 9).any():
+        raise ValueError("Puzzle strings may only contain digits 0-9 or '.'")
+    return grid
+
+
+def puzzles_to_strings(puzzles: np.ndarray) -> List[str]:
+    """Convert an (N, 81) array of values 0-9 to 81-character strings."""
+    text = (np.asarray(puzzles, dtype=np.uint8).reshape(-1, 81) + ord("0")).tobytes().decode("ascii")
+    return [text[i:i + 81] for i in range(0, len(text), 81)]
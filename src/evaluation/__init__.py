@@ -2,6 +2,7 @@
 
 from .metrics import compute_metrics, cell_accuracy, puzzle_accuracy, constraint_violations
 from .llm_comparison import LLMComparator
+from .sweep import sweep_recursion, recursion_flops, pareto_front
 
 __all__ = [
     "compute_metrics",
@@ -9,4 +10,7 @@ __all__ = [
     "puzzle_accuracy",
     "constraint_violations",
     "LLMComparator",
+    "sweep_recursion",
+    "recursion_flops",
+    "pareto_front",
 ]
@@ -0,0 +1,224 @@
+"""Accuracy-vs-compute sweep over latent recursions and deep steps.
+
+At inference the TRM recursion is a plain chain: every latent recursion of
+every deep step applies the same block, so the hidden state after T deep
+steps of n latent recursions is the block applied n * T times to the input
+embedding. The prediction of a setting (n, T) therefore depends only on
+k = n * T, and one pass of max(n * T) block applications gives the
+predictions of every setting in the grid, read off at the shared prefix
+lengths, instead of re-running the recursion per setting.
+
+Latency is still measured per setting with a standalone forward pass, since
+that is what serving pays.
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from ..model.trm import TRM
+
+
+def recursion_flops(model: TRM, n_latent: int, T: int) -> int:
+    """Analytic forward FLOPs per puzzle at a recursion setting.
+
+    Counts matmuls only (one multiply-add = 2 FLOPs); norms, activations and
+    the embedding-bag sum are comparatively negligible, apart from the 81
+    embedding rows added per puzzle, which are included.
+
+    Args:
+        model: TRM model
+        n_latent: Latent recursions per deep step
+        T: Deep steps
+
+    Returns:
+        FLOPs for one puzzle
+    """
+    hidden = model.hidden_dim
+    mlp_hidden = model.trm_block.mlp1.mlp.w2.in_features
+    # Each of the two SwiGLU MLPs: gate/up (hidden -> 2 * mlp_hidden), down
+    block = 2 * (2 * hidden * 2 * mlp_hidden + 2 * mlp_hidden * hidden)
+    flops = model.num_cells * hidden + n_latent * T * block
+    if model.use_act:
+        flops += T * 2 * hidden
+    flops += 2 * hidden * model.num_cells * model.num_classes
+    return flops
+
+
+@torch.inference_mode()
+def prefix_accuracy(
+    model: TRM,
+    puzzles: np.ndarray,
+    solutions: np.ndarray,
+    recursions: Sequence[int],
+    batch_size: int = 512,
+) -> Dict[int, Dict[str, float]]:
+    """Accuracy after each requested number of block applications.
+
+    Runs a single chain of max(recursions) block applications per batch and
+    decodes at every requested prefix length.
+
+    Args:
+        model: TRM model (eval mode)
+        puzzles: Shape (N, 81) test puzzles
+        solutions: Shape (N, 81) ground truth solutions
+        recursions: Total block applications (n_latent * T) to evaluate
+        batch_size: Puzzles per forward pass
+
+    Returns:
+        Recursions -> puzzle_accuracy, cell_accuracy, empty_cell_accuracy
+    """
+    device = next(model.parameters()).device
+    recursions = sorted(set(recursions))
+    correct_puzzles = {k: 0 for k in recursions}
+    correct_cells = {k: 0 for k in recursions}
+    correct_empty = {k: 0 for k in recursions}
+    n_empty = 0
+
+    for start in range(0, len(puzzles), batch_size):
+        batch = torch.as_tensor(puzzles[start:start + batch_size], device=device)
+        target = torch.as_tensor(solutions[start:start + batch_size], device=device)
+        empty = batch == 0
+        n_empty += int(empty.sum())
+
+        h = model.input_norm(model.embed_input(batch))
+        for k in range(1, recursions[-1] + 1):
+            h = model.trm_block(h)
+            if k in correct_puzzles:
+                correct = model._output_head(h).argmax(dim=-1) == target
+                correct_puzzles[k] += int(correct.all(dim=1).sum())
+                correct_cells[k] += int(correct.sum())
+                correct_empty[k] += int((correct & empty).sum())
+
+    n = len(puzzles)
+    return {
+        k: {
+            "puzzle_accuracy": correct_puzzles[k] / n,
+            "cell_accuracy": correct_cells[k] / (n * model.num_cells),
+            "empty_cell_accuracy": correct_empty[k] / max(n_empty, 1),
+        }
+        for k in recursions
+    }
+
+
+@torch.inference_mode()
+def measure_latency(
+    model: TRM,
+    puzzles: np.ndarray,
+    n_latent: int,
+    T: int,
+    repeats: int = 5,
+) -> float:
+    """Median wall time (ms) of one forward pass over a batch of puzzles."""
+    device = next(model.parameters()).device
+    batch = torch.as_tensor(puzzles, device=device)
+
+    def run():
+        model(batch, max_steps=T, n_latent=n_latent)
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+
+    run()  # warmup
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def pareto_front(
+    results: List[Dict],
+    cost_key: str,
+    accuracy_key: str = "puzzle_accuracy",
+) -> List[Dict]:
+    """Settings not dominated in (lower cost, higher accuracy), cheapest first."""
+    front = []
+    for result in sorted(results, key=lambda r: (r[cost_key], -r[accuracy_key])):
+        if not front or result[accuracy_key] > front[-1][accuracy_key]:
+            front.append(result)
+    return front
+
+
+def cheapest_meeting(
+    results: List[Dict],
+    target_accuracy: float,
+    cost_key: str = "latency_ms",
+    accuracy_key: str = "puzzle_accuracy",
+) -> Optional[Dict]:
+    """Lowest-cost setting whose accuracy reaches the target (None if none does)."""
+    candidates = [r for r in results if r[accuracy_key] >= target_accuracy]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda r: r[cost_key])
+
+
+def sweep_recursion(
+    model: TRM,
+    puzzles: np.ndarray,
+    solutions: np.ndarray,
+    latent_values: Sequence[int],
+    step_values: Sequence[int],
+    batch_size: int = 512,
+    timing_repeats: int = 5,
+) -> List[Dict]:
+    """Evaluate a checkpoint over a grid of (n_latent, T) settings.
+
+    Args:
+        model: TRM model (eval mode)
+        puzzles: Shape (N, 81) test puzzles
+        solutions: Shape (N, 81) ground truth solutions
+        latent_values: Latent recursions per deep step to try
+        step_values: Deep steps to try
+        batch_size: Puzzles per forward pass (also the latency batch)
+        timing_repeats: Timed forward passes per setting
+
+    Returns:
+        One dict per setting with n_latent, T, recursions, flops (per
+        puzzle), latency_ms (per batch), accuracies and whether the setting
+        is on the accuracy/FLOPs and accuracy/latency Pareto fronts
+    """
+    grid = [(n, T) for n in latent_values for T in step_values]
+    accuracy = prefix_accuracy(
+        model, puzzles, solutions, [n * T for n, T in grid], batch_size
+    )
+
+    timing_batch = puzzles[:batch_size]
+    results = []
+    for n, T in grid:
+        results.append({
+            "n_latent": n,
+            "T": T,
+            "recursions": n * T,
+            "flops": recursion_flops(model, n, T),
+            "latency_ms": measure_latency(model, timing_batch, n, T, timing_repeats),
+            **accuracy[n * T],
+        })
+
+    for cost_key, flag in (("flops", "pareto_flops"), ("latency_ms", "pareto_latency")):
+        front = {id(r) for r in pareto_front(results, cost_key)}
+        for result in results:
+            result[flag] = id(result) in front
+    return results
+
+
+def format_sweep_table(results: List[Dict], batch_size: Optional[int] = None) -> str:
+    """Format sweep results as a text table sorted by FLOPs.
+
+    Pareto-optimal settings are marked F (accuracy vs FLOPs) and/or
+    L (accuracy vs latency).
+    """
+    latency_label = f"ms/{batch_size}" if batch_size else "ms/batch"
+    header = (f"{'n_latent':>8} {'T':>3} {'recur':>5} {'MFLOPs':>8} {latency_label:>9} "
+              f"{'puzzle':>7} {'cell':>7} {'empty':>7}  pareto")
+    lines = [header, "-" * len(header)]
+    for r in sorted(results, key=lambda r: (r["flops"], r["latency_ms"])):
+        marks = ("F" if r["pareto_flops"] else "") + ("L" if r["pareto_latency"] else "")
+        lines.append(
+            f"{r['n_latent']:>8} {r['T']:>3} {r['recursions']:>5} {r['flops'] / 1e6:>8.1f} "
+            f"{r['latency_ms']:>9.2f} {r['puzzle_accuracy']:>7.2%} {r['cell_accuracy']:>7.2%} "
+            f"{r['empty_cell_accuracy']:>7.2%}  {marks}"
+        )
+    return "\n".join(lines)
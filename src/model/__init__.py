@@ -1,6 +1,32 @@
-"""Model components for TRM."""
+"""Model components for TRM.
 
-from .layers import RMSNorm, SwiGLU
-from .trm import TRM, TRMBlock
+Names are imported from their submodules on first access, so torch-free
+modules such as ``src.model.numpy_runtime`` can be imported without
+loading torch.
+"""
 
-__all__ = ["RMSNorm", "SwiGLU", "TRM", "TRMBlock"]
+import importlib
+
+_EXPORTS = {
+    "RMSNorm": ".layers",
+    "SwiGLU": ".layers",
+    "fuse_swiglu_state_dict": ".layers",
+    "TRM": ".trm",
+    "TRMBlock": ".trm",
+    "compile_model": ".compile",
+    "export_model": ".export",
+    "export_numpy_weights": ".export",
+    "load_exported": ".export",
+    "TRMInferenceEngine": ".inference",
+    "load_checkpoint_model": ".inference",
+    "quantize_model": ".inference",
+    "NumpyTRM": ".numpy_runtime",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
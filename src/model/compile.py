@@ -0,0 +1,91 @@
+"""torch.compile support for TRM.
+
+The recursion applies one small ``TRMBlock`` n_latent × T_deep times per
+forward, so eager execution is dominated by per-op dispatch overhead.
+Compiling the block fuses its norm/SwiGLU/residual ops into a few kernels.
+The block is compiled in place (``nn.Module.compile``), so parameter names,
+checkpoints and EMA tracking are unchanged.
+
+Compiled graphs are specialised on batch size; callers should feed a small
+set of static shapes (see ``compile_buckets``). Inductor's FX graph cache is
+pointed at a persistent directory so later runs skip recompilation.
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from .trm import TRM
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "trm" / "inductor"
+
+# All TRMBlocks share one forward code object, and every compiled model and
+# batch bucket adds a graph for it; torch's default limit of 8 is too small
+# for e.g. an fp32 and an int8 engine in one process.
+RECOMPILE_LIMIT = 64
+
+
+def enable_compile_cache(cache_dir: Optional[str] = None) -> Path:
+    """Persist compiled artifacts across processes.
+
+    Args:
+        cache_dir: Cache directory (default: $TORCHINDUCTOR_CACHE_DIR, else
+            ~/.cache/trm/inductor)
+
+    Returns:
+        The cache directory in use
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get("TORCHINDUCTOR_CACHE_DIR", DEFAULT_CACHE_DIR)
+    cache_dir = Path(cache_dir).expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["TORCHINDUCTOR_CACHE_DIR"] = str(cache_dir)
+
+    import torch._inductor.config as inductor_config
+    inductor_config.fx_graph_cache = True
+    return cache_dir
+
+
+def compile_model(
+    model: TRM,
+    dynamic: Optional[bool] = False,
+    mode: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> TRM:
+    """Compile the shared recursive block of a TRM in place.
+
+    Args:
+        model: TRM to compile
+        dynamic: False to specialise on each batch size (use with static
+            buckets); None lets torch fall back to a dynamic-shape graph
+            after the first shape change (e.g. for early-exit compaction)
+        mode: torch.compile mode, e.g. "max-autotune"
+        cache_dir: Persistent compile cache directory
+
+    Returns:
+        The same model, with ``trm_block`` compiled
+    """
+    enable_compile_cache(cache_dir)
+    import torch._dynamo.config as dynamo_config
+    dynamo_config.cache_size_limit = max(dynamo_config.cache_size_limit, RECOMPILE_LIMIT)
+    model.trm_block.compile(dynamic=dynamic, mode=mode)
+    return model
+
+
+def compile_buckets(batch_size: int, n_buckets: int = 5) -> List[int]:
+    """Static batch sizes to pad to when running a compiled model.
+
+    Powers of two ending at batch_size, limited to n_buckets so the number
+    of compiled graphs stays below torch's recompile limit.
+
+    Args:
+        batch_size: Largest batch
+        n_buckets: Maximum number of buckets
+
+    Returns:
+        Ascending list of bucket sizes
+    """
+    buckets = [batch_size]
+    while len(buckets) < n_buckets and buckets[0] > 1:
+        buckets.insert(0, (buckets[0] + 1) // 2)
+    return buckets
@@ -0,0 +1,173 @@
+"""Self-contained inference artifacts for trained TRM checkpoints.
+
+Exports the model with EMA weights baked in and the recursion depth fixed,
+as either a TorchScript trace (``.ts``) or a ``torch.export`` program
+(``.pt2``) with a dynamic batch dimension. Artifacts map (batch, 81)
+puzzles to (batch, 81) predictions and load with ``torch`` alone: no TRM
+class, training code or optimizer state is needed.
+
+The ``numpy`` format (``.npz``) holds plain weight arrays for the torch-free
+runtime in ``numpy_runtime``.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from .numpy_runtime import save_weights
+from .trm import TRM
+
+EXPORT_FORMATS = {"torchscript": ".ts", "export": ".pt2", "numpy": ".npz"}
+METADATA_FILE = "trm_export.json"
+
+
+class TRMPredictor(nn.Module):
+    """TRM forward at a fixed number of deep steps, returning predictions."""
+
+    def __init__(self, model: TRM, T: int):
+        super().__init__()
+        self.model = model
+        self.T = T
+
+    def forward(self, puzzles: torch.Tensor) -> torch.Tensor:
+        logits, _ = self.model(puzzles, max_steps=self.T)
+        return logits.argmax(dim=-1)
+
+
+def export_numpy_weights(
+    model: TRM,
+    output_path: str,
+    T: Optional[int] = None,
+    metadata: Optional[Dict] = None,
+) -> Path:
+    """Write weights for NumpyTRM as an uncompressed .npz.
+
+    Matrices are stored transposed (in_features, out_features) so the
+    runtime computes ``x @ W`` on contiguous memory, and SwiGLU gate/up
+    projections are stored fused as ``w13``.
+
+    Args:
+        model: TRM with inference weights (e.g. EMA) loaded
+        output_path: .npz path
+        T: Default deep steps for the runtime (default: model.T_deep)
+        metadata: Extra JSON-serialisable info
+
+    Returns:
+        Path of the written file
+    """
+    def array(tensor: torch.Tensor):
+        return tensor.detach().float().cpu().numpy()
+
+    arrays = {
+        "embedding": array(model.input_proj.weight.t()),
+        "input_norm": array(model.input_norm.weight),
+        "output_norm": array(model.output_norm.weight),
+        "output_proj": array(model.output_proj.weight.t()),
+    }
+    blocks = [model.trm_block.mlp1, model.trm_block.mlp2]
+    for i, block in enumerate(blocks):
+        swiglu = block.mlp
+        w13 = swiglu.w13.weight if swiglu.fused else torch.cat([swiglu.w1.weight, swiglu.w3.weight])
+        arrays[f"blocks.{i}.norm"] = array(block.norm.weight)
+        arrays[f"blocks.{i}.w13"] = array(w13.t())
+        arrays[f"blocks.{i}.w2"] = array(swiglu.w2.weight.t())
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    save_weights(str(output_path), arrays, {
+        "format": "numpy",
+        "T": T if T is not None else model.T_deep,
+        "hidden_dim": model.hidden_dim,
+        "n_latent": model.n_latent,
+        "n_blocks": len(blocks),
+        "eps": model.input_norm.eps,
+        **(metadata or {}),
+    })
+    return output_path
+
+
+def export_model(
+    model: TRM,
+    output_path: str,
+    fmt: str = "torchscript",
+    T: Optional[int] = None,
+    metadata: Optional[Dict] = None,
+    example_batch_size: int = 8,
+) -> Path:
+    """Write a standalone inference artifact.
+
+    Args:
+        model: TRM with inference weights (e.g. EMA) loaded
+        output_path: Artifact path
+        fmt: "torchscript" (jit.trace), "export" (torch.export, dynamic
+            batch) or "numpy" (weights for NumpyTRM)
+        T: Deep recursion steps baked into the artifact (default: model.T_deep)
+        metadata: Extra JSON-serialisable info stored alongside the graph
+        example_batch_size: Batch size of the tracing example
+
+    Returns:
+        Path of the written artifact
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {sorted(EXPORT_FORMATS)}")
+
+    if fmt == "numpy":
+        return export_numpy_weights(model, output_path, T=T, metadata=metadata)
+
+    T = T if T is not None else model.T_deep
+    device = next(model.parameters()).device
+    predictor = TRMPredictor(model.eval(), T).eval()
+    example = torch.randint(0, 10, (example_batch_size, 81), device=device)
+
+    extra_files = {
+        METADATA_FILE: json.dumps({
+            "format": fmt,
+            "T": T,
+            "hidden_dim": model.hidden_dim,
+            "n_latent": model.n_latent,
+            **(metadata or {}),
+        })
+    }
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with torch.no_grad():
+        if fmt == "torchscript":
+            traced = torch.jit.trace(predictor, example, check_trace=False)
+            traced = torch.jit.freeze(traced)
+            torch.jit.save(traced, str(output_path), _extra_files=extra_files)
+        else:
+            batch = torch.export.Dim("batch", min=1)
+            program = torch.export.export(predictor, (example,), dynamic_shapes=({0: batch},))
+            torch.export.save(program, str(output_path), extra_files=extra_files)
+
+    return output_path
+
+
+def load_exported(path: str, device: str = "cpu") -> Tuple[nn.Module, Dict]:
+    """Load an artifact written by export_model.
+
+    Args:
+        path: Artifact path (.ts or .pt2)
+        device: Device to load onto
+
+    Returns:
+        (module, metadata): module maps (batch, 81) puzzles to predictions
+    """
+    if Path(path).suffix == EXPORT_FORMATS["numpy"]:
+        raise ValueError(f"{path} holds NumPy weights; load it with NumpyTRM.load")
+    extra_files = {METADATA_FILE: ""}
+    if Path(path).suffix == EXPORT_FORMATS["export"]:
+        program = torch.export.load(str(path), extra_files=extra_files)
+        module = program.module().to(device)
+    else:
+        module = torch.jit.load(str(path), map_location=device, _extra_files=extra_files)
+    return module, json.loads(extra_files[METADATA_FILE])
+
+
+def is_exported_artifact(path: str) -> bool:
+    """Whether a path names a torch artifact (.ts/.pt2) rather than a checkpoint."""
+    return Path(path).suffix in (EXPORT_FORMATS["torchscript"], EXPORT_FORMATS["export"])
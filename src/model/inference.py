@@ -0,0 +1,372 @@
+"""Batched inference engine for trained TRM checkpoints.
+
+Owns a loaded TRM with EMA weights baked in and runs it under
+``torch.inference_mode`` with input/output buffers preallocated per batch
+size bucket, so evaluation, comparison and solving share one fast path.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+from tqdm import tqdm
+
+from .compile import compile_buckets, compile_model
+from .export import load_exported
+from .trm import TRM
+from .tuning import apply_threads, available_cores
+
+
+def quantize_model(model: TRM) -> TRM:
+    """Dynamically quantize the recursive block's Linear layers to int8.
+
+    Only ``trm_block`` is quantized: it holds nearly all FLOPs (applied
+    T × n_latent times per puzzle). ``input_proj`` is used as an embedding
+    table and ``output_proj`` runs once per forward, so both stay in fp32.
+    CPU only.
+
+    Args:
+        model: TRM on CPU, in eval mode
+
+    Returns:
+        The same model with int8 dynamic-quantized ``trm_block`` Linears
+    """
+    model.trm_block = torch.ao.quantization.quantize_dynamic(
+        model.trm_block, {nn.Linear}, dtype=torch.qint8
+    )
+    return model
+
+
+def load_checkpoint_model(
+    checkpoint_path: str,
+    device: str = "cpu",
+    fused_swiglu: Optional[bool] = None,
+    use_ema: bool = True,
+    quantize: bool = False,
+) -> TRM:
+    """Load a TRM from a training checkpoint for inference.
+
+    EMA shadow weights are keyed by parameter name, so they are loaded
+    straight into the model instead of going through the training EMA class.
+
+    Args:
+        checkpoint_path: Path to a checkpoint saved by TRMTrainer
+        device: Device to load onto
+        fused_swiglu: Build fused SwiGLU layers (default: as trained)
+        use_ema: Replace model weights with EMA weights if available
+        quantize: Apply int8 dynamic quantization (requires device="cpu")
+
+    Returns:
+        TRM in eval mode
+    """
+    if quantize and torch.device(device).type != "cpu":
+        raise ValueError("int8 dynamic quantization is only supported on CPU")
+
+    checkpoint = torch.load(checkpoint_path, map_location=device)
+    config = checkpoint["config"]
+    if fused_swiglu is None:
+        fused_swiglu = config.get("fused_swiglu", False)
+
+    model = TRM(
+        hidden_dim=config["hidden_dim"],
+        n_latent=config["n_latent"],
+        T_deep=config["T_deep"],
+        use_act=config["use_act"],
+        fused_swiglu=fused_swiglu,
+    )
+    model.load_state_dict(checkpoint["model_state_dict"])
+
+    # Load EMA weights if available
+    if use_ema and "ema_state_dict" in checkpoint:
+        model.load_state_dict(checkpoint["ema_state_dict"]["shadow"], strict=False)
+
+    model.to(device)
+    model.eval()
+    if quantize:
+        quantize_model(model)
+    return model
+
+
+class TRMInferenceEngine:
+    """Reusable batched TRM inference.
+
+    Inputs are processed in batches of at most ``batch_size``. Each batch is
+    padded up to a bucket (a power of two, capped at ``batch_size``, or the
+    smallest of ``buckets`` that fits) whose input/output buffers are
+    allocated once and reused; host buffers are pinned when running on CUDA.
+
+    Usage:
+        engine = TRMInferenceEngine.from_checkpoint("outputs/best.pt")
+        predictions = engine.solve(puzzles)  # (N, 81) -> (N, 81)
+
+        for predictions in engine.iter_solve(chunks):
+            ...
+
+    Artifacts written by ``export_model`` are served the same way via
+    ``TRMInferenceEngine.from_export``.
+    """
+
+    def __init__(
+        self,
+        model: TRM,
+        batch_size: int = 512,
+        device: Optional[str] = None,
+        buckets: Optional[List[int]] = None,
+        preserve_givens: bool = False,
+        **forward_kwargs,
+    ):
+        """Initialize the engine.
+
+        Args:
+            model: Trained TRM (weights as they should be used for inference)
+            batch_size: Maximum number of puzzles per forward pass
+            device: Device to run on (default: the model's device)
+            buckets: Fixed padded batch sizes (default: every power of two);
+                keeps compiled models to a few static shapes
+            preserve_givens: Copy given cells into the predictions instead of
+                decoding them (applied after the argmax, so it costs nothing)
+            **forward_kwargs: Extra arguments for TRM.forward, e.g. max_steps,
+                halt_threshold, converge_steps
+        """
+        self.device = torch.device(device) if device else next(model.parameters()).device
+        self.model = model.to(self.device)
+        if isinstance(model, TRM):
+            self.model.eval()
+        # Deep steps baked into an exported artifact (None for a TRM)
+        self.exported_steps: Optional[int] = None
+        self.batch_size = batch_size
+        self.buckets = sorted(buckets) if buckets else None
+        if self.buckets and self.buckets[-1] < batch_size:
+            raise ValueError(f"Largest bucket {self.buckets[-1]} is smaller than batch_size {batch_size}")
+        self.preserve_givens = preserve_givens
+        self.forward_kwargs = forward_kwargs
+        self._buffers: Dict[int, Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]] = {}
+
+    @classmethod
+    def from_checkpoint(
+        cls,
+        checkpoint_path: str,
+        device: str = "cpu",
+        batch_size: int = 512,
+        fused_swiglu: Optional[bool] = None,
+        quantize: bool = False,
+        compile: bool = False,
+        preserve_givens: bool = False,
+        **forward_kwargs,
+    ) -> "TRMInferenceEngine":
+        """Build an engine from a training checkpoint (EMA weights applied).
+
+        With ``compile=True`` the recursive block is compiled and batches are
+        padded to a few static buckets. Early exit compacts batches to
+        arbitrary sizes, so it compiles a dynamic-shape graph instead.
+        """
+        model = load_checkpoint_model(
+            checkpoint_path, device, fused_swiglu=fused_swiglu, quantize=quantize
+        )
+        buckets = None
+        if compile:
+            early_exit = (
+                forward_kwargs.get("halt_threshold") is not None
+                or forward_kwargs.get("converge_steps") is not None
+            )
+            compile_model(model, dynamic=None if early_exit else False)
+            buckets = compile_buckets(batch_size)
+        return cls(
+            model, batch_size=batch_size, device=device, buckets=buckets,
+            preserve_givens=preserve_givens, **forward_kwargs,
+        )
+
+    @classmethod
+    def from_export(
+        cls,
+        artifact_path: str,
+        device: str = "cpu",
+        batch_size: int = 512,
+        preserve_givens: bool = False,
+    ) -> "TRMInferenceEngine":
+        """Build an engine from an artifact written by export_model.
+
+        Halting options are fixed at export time, so no forward arguments
+        are accepted.
+        """
+        module, metadata = load_exported(artifact_path, device)
+        engine = cls(module, batch_size=batch_size, device=device, preserve_givens=preserve_givens)
+        engine.exported_steps = metadata["T"]
+        return engine
+
+    def warmup(self):
+        """Run one batch per bucket so compilation happens before real traffic."""
+        for bucket in self.buckets or [self._bucket(self.batch_size)]:
+            self._run_batch(np.zeros((bucket, 81), dtype=np.int64))
+
+    def _bucket(self, n: int) -> int:
+        """Smallest bucket that holds n puzzles."""
+        if self.buckets:
+            return next(b for b in self.buckets if b >= n)
+        bucket = 1
+        while bucket < n:
+            bucket *= 2
+        return min(bucket, self.batch_size)
+
+    def _get_buffers(self, bucket: int):
+        """Return (host_in, device_in, device_out, host_out) buffers for a bucket."""
+        if bucket not in self._buffers:
+            pin = self.device.type == "cuda"
+            host_in = torch.zeros(bucket, 81, dtype=torch.long, pin_memory=pin)
+            host_out = torch.zeros(bucket, 81, dtype=torch.long, pin_memory=pin)
+            if pin:
+                device_in = torch.zeros(bucket, 81, dtype=torch.long, device=self.device)
+                device_out = torch.zeros(bucket, 81, dtype=torch.long, device=self.device)
+            else:
+                device_in, device_out = host_in, host_out
+            self._buffers[bucket] = (host_in, device_in, device_out, host_out)
+        return self._buffers[bucket]
+
+    @torch.inference_mode()
+    def _run_batch(self, puzzles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Solve at most batch_size puzzles.
+
+        Returns:
+            (predictions, steps) with shapes (n, 81) and (n,)
+        """
+        n = puzzles.shape[0]
+        host_in, device_in, device_out, host_out = self._get_buffers(self._bucket(n))
+
+        host_in[:n].copy_(torch.from_numpy(np.ascontiguousarray(puzzles)))
+        host_in[n:].zero_()
+        if device_in is not host_in:
+            device_in.copy_(host_in, non_blocking=True)
+
+        if self.exported_steps is not None:
+            device_out.copy_(self.model(device_in))
+            steps = np.full(n, self.exported_steps, dtype=np.int64)
+        else:
+            logits, info = self.model(device_in, **self.forward_kwargs)
+            torch.argmax(logits, dim=-1, out=device_out)
+            steps = info["steps"][:n].cpu().numpy()
+        if self.preserve_givens:
+            torch.where(device_in != 0, device_in, device_out, out=device_out)
+        if host_out is not device_out:
+            host_out.copy_(device_out)
+
+        return host_out[:n].numpy().copy(), steps
+
+    def solve(
+        self,
+        puzzles: np.ndarray,
+        return_steps: bool = False,
+        progress: bool = False,
+    ) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """Solve an array of puzzles.
+
+        Args:
+            puzzles: Shape (N, 81) with values 0-9 (0 = empty)
+            return_steps: Also return the deep steps used per puzzle
+            progress: Show a progress bar
+
+        Returns:
+            Predictions of shape (N, 81), plus steps of shape (N,) if requested
+        """
+        puzzles = np.asarray(puzzles).reshape(-1, 81)
+        predictions = np.empty(puzzles.shape, dtype=np.int64)
+        steps = np.empty(puzzles.shape[0], dtype=np.int64)
+
+        starts = range(0, puzzles.shape[0], self.batch_size)
+        if progress:
+            starts = tqdm(starts, desc="Solving")
+        for start in starts:
+            end = start + self.batch_size
+            predictions[start:end], steps[start:end] = self._run_batch(puzzles[start:end])
+
+        if return_steps:
+            return predictions, steps
+        return predictions
+
+    def iter_solve(
+        self,
+        puzzles: Union[np.ndarray, Iterable[np.ndarray]],
+    ) -> Iterator[np.ndarray]:
+        """Lazily solve a large array or a stream of puzzle chunks.
+
+        Args:
+            puzzles: Shape (N, 81) array, or an iterable of (n, 81) chunks
+
+        Yields:
+            Predictions for each batch (for arrays) or each input chunk
+        """
+        chunks = puzzles
+        if isinstance(puzzles, np.ndarray):
+            chunks = (
+                puzzles[start:start + self.batch_size]
+                for start in range(0, puzzles.shape[0], self.batch_size)
+            )
+        for chunk in chunks:
+            yield self.solve(chunk)
+
+
+# Engine owned by each solve_sharded worker process
+_worker_engine: Optional[TRMInferenceEngine] = None
+
+
+def _init_worker(
+    checkpoint_path: str,
+    num_threads: int,
+    num_interop_threads: Optional[int],
+    engine_kwargs: Dict[str, Any],
+):
+    """Process-pool initializer: pin thread pools and load the model once."""
+    global _worker_engine
+    apply_threads(num_threads, num_interop_threads)
+    _worker_engine = TRMInferenceEngine.from_checkpoint(checkpoint_path, device="cpu", **engine_kwargs)
+
+
+def _solve_shard(puzzles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return _worker_engine.solve(puzzles, return_steps=True)
+
+
+def solve_sharded(
+    checkpoint_path: str,
+    puzzles: np.ndarray,
+    workers: int,
+    threads_per_worker: Optional[int] = None,
+    interop_threads: Optional[int] = None,
+    **engine_kwargs,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve puzzles on CPU across worker processes.
+
+    The puzzles are split into ``workers`` contiguous shards; each worker
+    process loads the checkpoint once with its intra-op threads pinned, and
+    the shard results are concatenated back in input order.
+
+    Args:
+        checkpoint_path: Path to a training checkpoint
+        puzzles: Shape (N, 81) with values 0-9 (0 = empty)
+        workers: Number of worker processes (and shards)
+        threads_per_worker: torch intra-op threads per worker
+            (default: available cores // workers)
+        interop_threads: torch inter-op threads per worker (default: torch's)
+        **engine_kwargs: Passed to TRMInferenceEngine.from_checkpoint, e.g.
+            batch_size, max_steps, halt_threshold
+
+    Returns:
+        (predictions, steps) with shapes (N, 81) and (N,)
+    """
+    if threads_per_worker is None:
+        threads_per_worker = max(1, available_cores() // workers)
+    shards = np.array_split(np.asarray(puzzles).reshape(-1, 81), workers)
+
+    # spawn: forking a parent with initialized torch thread pools is unsafe
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(checkpoint_path, threads_per_worker, interop_threads, engine_kwargs),
+    ) as pool:
+        results = list(pool.map(_solve_shard, shards))
+
+    predictions = np.concatenate([p for p, _ in results])
+    steps = np.concatenate([s for _, s in results])
+    return predictions, steps
@@ -31,35 +31,82 @@ class SwiGLU(nn.Module):
 
     This is a gated variant that provides better gradient flow than ReLU/GELU.
     The hidden dimension is expanded by a factor (typically 8/3 to maintain param count).
+
+    With ``fused=True`` the two input projections are stored as a single
+    ``w13`` weight ([w1; w3] stacked) and computed with one GEMM. Checkpoints
+    saved with separate ``w1``/``w3`` weights are converted on load.
     """
 
-    def __init__(self, in_features: int, hidden_features: int = None, out_features: int = None):
+    def __init__(
+        self,
+        in_features: int,
+        hidden_features: int = None,
+        out_features: int = None,
+        fused: bool = False,
+    ):
         super().__init__()
         out_features = out_features or in_features
         hidden_features = hidden_features or int(in_features * 8 / 3)
         # Round to multiple of 64 for efficiency
         hidden_features = ((hidden_features + 63) // 64) * 64
-
-        self.w1 = nn.Linear(in_features, hidden_features, bias=False)
+        self.fused = fused
+
+        if fused:
+            self.w13 = nn.Linear(in_features, 2 * hidden_features, bias=False)
+            self.register_load_state_dict_pre_hook(_fuse_swiglu_hook)
+        else:
+            self.w1 = nn.Linear(in_features, hidden_features, bias=False)
+            self.w3 = nn.Linear(in_features, hidden_features, bias=False)  # Gate projection
         self.w2 = nn.Linear(hidden_features, out_features, bias=False)
-        self.w3 = nn.Linear(in_features, hidden_features, bias=False)  # Gate projection
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         # SwiGLU: (x @ W1) * swish(x @ W3), then project back
+        if self.fused:
+            x1, x3 = self.w13(x).chunk(2, dim=-1)
+            return self.w2(F.silu(x1) * x3)
         return self.w2(F.silu(self.w1(x)) * self.w3(x))
 
 
+def fuse_swiglu_state_dict(state_dict: dict, prefix: str = "") -> dict:
+    """Merge separate SwiGLU ``w1``/``w3`` weights into fused ``w13`` weights.
+
+    Args:
+        state_dict: Parameter dict, modified in place
+        prefix: Only convert keys under this prefix
+
+    Returns:
+        The same dict, with every ``w1.weight``/``w3.weight`` pair replaced
+        by a single ``w13.weight``
+    """
+    for w1_key in [k for k in state_dict if k.startswith(prefix) and k.endswith("w1.weight")]:
+        base = w1_key[: -len("w1.weight")]
+        w3_key = base + "w3.weight"
+        if w3_key in state_dict and (base == "" or base.endswith(".")):
+            state_dict[base + "w13.weight"] = torch.cat(
+                [state_dict.pop(w1_key), state_dict.pop(w3_key)], dim=0
+            )
+    return state_dict
+
+
+def _fuse_swiglu_hook(module, state_dict, prefix, *args):
+    """Load-state-dict pre-hook that lets fused SwiGLU layers load unfused weights."""
+    fuse_swiglu_state_dict(state_dict, prefix)
+
+
 class MLPBlock(nn.Module):
     """MLP block with RMSNorm and SwiGLU.
 
     Structure: RMSNorm -> SwiGLU -> residual connection
     """
 
-    def __init__(self, dim: int, mlp_ratio: float = 8/3):
+    def __init__(self, dim: int, mlp_ratio: float = 8/3, fused: bool = False):
         super().__init__()
         self.norm = RMSNorm(dim)
         hidden_dim = int(dim * mlp_ratio)
-        self.mlp = SwiGLU(dim, hidden_dim, dim)
+        self.mlp = SwiGLU(dim, hidden_dim, dim, fused=fused)
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        return x + self.mlp(self.norm(x))
+        # Explicit cast: under autocast the SwiGLU output is bf16/fp16 while
+        # x stays fp32, and Inductor would otherwise fuse the residual add
+        # into a mixed-dtype addmm that fails at runtime (torch 2.8)
+        return x + self.mlp(self.norm(x)).to(x.dtype)
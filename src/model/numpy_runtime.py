@@ -0,0 +1,240 @@
+"""Pure-NumPy TRM inference runtime.
+
+Runs the recursive forward pass with batched NumPy matmuls, so lightweight
+solve workers need neither torch nor the training code. Weights come from
+an uncompressed ``.npz`` written by ``export_numpy_weights`` (or
+``python main.py export --format numpy``); each member is memory-mapped in
+place, so workers sharing a weight file share its pages.
+
+This module must not import torch.
+"""
+
+import io
+import json
+import struct
+import zipfile
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+NUM_CELLS = 81
+NUM_CLASSES = 10
+META_KEY = "meta"
+
+# Array data is aligned to this many bytes inside the archive so the
+# memory-mapped weights can be handed to BLAS without copying.
+_ALIGNMENT = 64
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+_PADDING_EXTRA_ID = 0xA11C
+
+
+def save_weights(path: str, arrays: Dict[str, np.ndarray], meta: Dict) -> None:
+    """Write arrays and metadata as an uncompressed, aligned .npz archive.
+
+    The result is a regular .npz (``np.load`` reads it), but every member is
+    stored uncompressed with its data aligned, so ``load_weights`` can
+    memory-map it.
+
+    Args:
+        path: Output path
+        arrays: Name -> array
+        meta: JSON-serialisable metadata
+    """
+    members = dict(arrays)
+    members[META_KEY] = np.array(json.dumps(meta))
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for name, array in members.items():
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, np.ascontiguousarray(array), allow_pickle=False)
+
+            info = zipfile.ZipInfo(name + ".npy")
+            info.compress_type = zipfile.ZIP_STORED
+            # .npy headers are padded to 64 bytes, so aligning the start of
+            # the member aligns the array data; pad via a zip extra field.
+            header_end = archive.fp.tell() + _ZIP_LOCAL_HEADER.size + len(info.filename) + 4
+            padding = -header_end % _ALIGNMENT
+            info.extra = struct.pack("<HH", _PADDING_EXTRA_ID, padding) + b"\0" * padding
+            archive.writestr(info, buffer.getvalue())
+
+
+def load_weights(path: str, mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Load arrays and metadata written by save_weights.
+
+    Args:
+        path: .npz path
+        mmap: Memory-map members instead of reading them into memory
+
+    Returns:
+        (arrays, meta)
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[: -len(".npy")]
+            if not mmap or info.compress_type != zipfile.ZIP_STORED or name == META_KEY:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+
+            f.seek(info.header_offset)
+            fields = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+            name_length, extra_length = fields[-2], fields[-1]
+            f.seek(info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length)
+
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"Member {name!r} holds Python objects and cannot be mapped")
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                order="F" if fortran_order else "C",
+            ).view(np.ndarray)
+
+    meta = json.loads(arrays.pop(META_KEY).item())
+    return arrays, meta
+
+
+def rms_norm(x: np.ndarray, weight: np.ndarray, eps: float) -> np.ndarray:
+    """RMSNorm over the last axis."""
+    scale = 1.0 / np.sqrt(np.mean(x * x, axis=-1, keepdims=True) + eps)
+    return x * scale * weight
+
+
+def silu(x: np.ndarray) -> np.ndarray:
+    """x * sigmoid(x); exp overflow for very negative x correctly yields 0."""
+    with np.errstate(over="ignore"):
+        return x / (1.0 + np.exp(-x))
+
+
+class NumpyTRM:
+    """TRM forward pass in NumPy at a fixed number of deep steps.
+
+    Exposes the same ``solve``/``iter_solve`` interface as
+    ``TRMInferenceEngine``.
+
+    Usage:
+        runtime = NumpyTRM.load("outputs/best.npz")
+        predictions = runtime.solve(puzzles)  # (N, 81) -> (N, 81)
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, np.ndarray],
+        meta: Dict,
+        batch_size: int = 512,
+        max_steps: Optional[int] = None,
+    ):
+        """Initialize the runtime.
+
+        Args:
+            weights: Arrays as written by export_numpy_weights
+            meta: Export metadata (n_latent, T, eps, ...)
+            batch_size: Maximum number of puzzles per forward pass
+            max_steps: Deep steps to run (default: T from the export)
+        """
+        self.weights = weights
+        self.meta = meta
+        self.batch_size = batch_size
+        self.n_latent = meta["n_latent"]
+        self.T = max_steps if max_steps is not None else meta["T"]
+        self.eps = meta["eps"]
+        self.n_blocks = meta["n_blocks"]
+        self.cell_offsets = np.arange(NUM_CELLS) * NUM_CLASSES
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        batch_size: int = 512,
+        max_steps: Optional[int] = None,
+        mmap: bool = True,
+    ) -> "NumpyTRM":
+        """Load a runtime from an exported .npz file."""
+        weights, meta = load_weights(path, mmap=mmap)
+        return cls(weights, meta, batch_size=batch_size, max_steps=max_steps)
+
+    def encode_input(self, puzzles: np.ndarray) -> np.ndarray:
+        """Embed puzzles: one-hot (batch, 810) times the (810, hidden) table.
+
+        Args:
+            puzzles: Shape (batch, 81) with values 0-9
+
+        Returns:
+            Shape (batch, hidden_dim), after the input RMSNorm
+        """
+        # NumPy has no fused embedding-bag: a gather-sum materializes
+        # (batch, 81, hidden) rows first and is several times slower than
+        # this one BLAS matmul
+        one_hot = np.zeros((puzzles.shape[0], NUM_CELLS * NUM_CLASSES), dtype=np.float32)
+        rows = np.arange(puzzles.shape[0])[:, None]
+        one_hot[rows, puzzles.astype(np.int64) + self.cell_offsets] = 1.0
+        return rms_norm(one_hot @ self.weights["embedding"], self.weights["input_norm"], self.eps)
+
+    def block(self, h: np.ndarray) -> np.ndarray:
+        """One application of the shared TRM block (residual SwiGLU MLPs)."""
+        for i in range(self.n_blocks):
+            w13 = self.weights[f"blocks.{i}.w13"]
+            x1, x3 = np.split(rms_norm(h, self.weights[f"blocks.{i}.norm"], self.eps) @ w13, 2, axis=-1)
+            h = h + (silu(x1) * x3) @ self.weights[f"blocks.{i}.w2"]
+        return h
+
+    def forward(self, puzzles: np.ndarray) -> np.ndarray:
+        """Run the full recursion.
+
+        Args:
+            puzzles: Shape (batch, 81) with values 0-9
+
+        Returns:
+            Shape (batch, 81, 10) logits after the last deep step
+        """
+        h = self.encode_input(puzzles)
+        for _ in range(self.T * self.n_latent):
+            h = self.block(h)
+        h = rms_norm(h, self.weights["output_norm"], self.eps)
+        logits = h @ self.weights["output_proj"]
+        return logits.reshape(-1, NUM_CELLS, NUM_CLASSES)
+
+    def decode_output(self, logits: np.ndarray) -> np.ndarray:
+        """Convert (batch, 81, 10) logits to (batch, 81) predictions."""
+        return logits.argmax(axis=-1)
+
+    def solve(
+        self,
+        puzzles: np.ndarray,
+        return_steps: bool = False,
+    ) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """Solve an array of puzzles in batches.
+
+        Args:
+            puzzles: Shape (N, 81) with values 0-9 (0 = empty)
+            return_steps: Also return the deep steps used per puzzle
+
+        Returns:
+            Predictions of shape (N, 81), plus steps of shape (N,) if requested
+        """
+        puzzles = np.asarray(puzzles).reshape(-1, NUM_CELLS)
+        predictions = np.empty(puzzles.shape, dtype=np.int64)
+        for start in range(0, puzzles.shape[0], self.batch_size):
+            batch = puzzles[start:start + self.batch_size]
+            predictions[start:start + len(batch)] = self.decode_output(self.forward(batch))
+
+        if return_steps:
+            return predictions, np.full(puzzles.shape[0], self.T, dtype=np.int64)
+        return predictions
+
+    def iter_solve(
+        self,
+        puzzles: Union[np.ndarray, Iterable[np.ndarray]],
+    ) -> Iterator[np.ndarray]:
+        """Lazily solve a large array or a stream of puzzle chunks."""
+        chunks = puzzles
+        if isinstance(puzzles, np.ndarray):
+            chunks = (
+                puzzles[start:start + self.batch_size]
+                for start in range(0, puzzles.shape[0], self.batch_size)
+            )
+        for chunk in chunks:
+            yield self.solve(chunk)
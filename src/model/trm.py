@@ -7,7 +7,8 @@ Uses MLP architecture (instead of attention) since context length (81) <= hidden
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from typing import Tuple, List, Optional
+from torch.utils.checkpoint import checkpoint
+from typing import Iterator, Tuple, List, Optional
 
 from .layers import RMSNorm, SwiGLU, MLPBlock
 
@@ -18,10 +19,10 @@ class TRMBlock(nn.Module):
     This block is shared across all recursion steps to enable iterative refinement.
     """
 
-    def __init__(self, hidden_dim: int = 512, mlp_ratio: float = 8/3):
+    def __init__(self, hidden_dim: int = 512, mlp_ratio: float = 8/3, fused_swiglu: bool = False):
         super().__init__()
-        self.mlp1 = MLPBlock(hidden_dim, mlp_ratio)
-        self.mlp2 = MLPBlock(hidden_dim, mlp_ratio)
+        self.mlp1 = MLPBlock(hidden_dim, mlp_ratio, fused=fused_swiglu)
+        self.mlp2 = MLPBlock(hidden_dim, mlp_ratio, fused=fused_swiglu)
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         x = self.mlp1(x)
@@ -34,7 +35,8 @@ class TRM(nn.Module):
 
     Architecture:
     - Input: 81 cells × 10 one-hot (0=empty, 1-9=digits) = 810 dims
-    - Embedding layer projects to hidden_dim
+    - Embedding layer projects to hidden_dim (computed as a gather-sum of
+      input_proj columns rather than a dense one-hot matmul)
     - Shared TRM block applied recursively:
       - n latent recursions per deep step
       - T deep recursion loops with output heads
@@ -52,6 +54,7 @@ class TRM(nn.Module):
         T_deep: int = 3,  # Deep recursion loops
         mlp_ratio: float = 8/3,
         use_act: bool = True,  # Adaptive Computation Time
+        fused_swiglu: bool = False,  # Single GEMM for SwiGLU gate/up projections
     ):
         super().__init__()
         self.hidden_dim = hidden_dim
@@ -60,6 +63,7 @@ class TRM(nn.Module):
         self.n_latent = n_latent
         self.T_deep = T_deep
         self.use_act = use_act
+        self.fused_swiglu = fused_swiglu
 
         # Input dimension: 81 cells × 10 one-hot = 810
         input_dim = num_cells * num_classes
@@ -67,9 +71,15 @@ class TRM(nn.Module):
         # Input embedding
         self.input_proj = nn.Linear(input_dim, hidden_dim, bias=False)
         self.input_norm = RMSNorm(hidden_dim)
+        # Row of the one-hot layout where each cell's 10 digit slots begin
+        self.register_buffer(
+            "cell_offsets",
+            torch.arange(num_cells) * num_classes,
+            persistent=False,
+        )
 
         # Shared TRM block (applied recursively)
-        self.trm_block = TRMBlock(hidden_dim, mlp_ratio)
+        self.trm_block = TRMBlock(hidden_dim, mlp_ratio, fused_swiglu)
 
         # Output projection for predictions
         self.output_norm = RMSNorm(hidden_dim)
@@ -86,6 +96,11 @@ class TRM(nn.Module):
         for module in self.modules():
             if isinstance(module, nn.Linear):
                 nn.init.xavier_uniform_(module.weight, gain=0.1)
+        # Init fused [w1; w3] per half so it matches the unfused layout
+        for module in self.modules():
+            if isinstance(module, SwiGLU) and module.fused:
+                for half in module.w13.weight.data.chunk(2, dim=0):
+                    nn.init.xavier_uniform_(half, gain=0.1)
 
     def encode_input(self, puzzles: torch.Tensor) -> torch.Tensor:
         """Convert puzzle grid to one-hot encoded input.
@@ -102,24 +117,56 @@ class TRM(nn.Module):
         # Flatten to (batch, 81*10)
         return one_hot.float().view(batch_size, -1)
 
-    def decode_output(self, logits: torch.Tensor) -> torch.Tensor:
+    def embed_input(self, puzzles: torch.Tensor) -> torch.Tensor:
+        """Project puzzles to hidden_dim without materializing the one-hot input.
+
+        Equivalent to ``input_proj(encode_input(puzzles))``: each cell selects
+        one of its 10 columns of ``input_proj.weight`` and the 81 selected
+        columns are summed, so existing checkpoints load unchanged.
+
+        Args:
+            puzzles: Shape (batch, 81) with values 0-9
+
+        Returns:
+            Shape (batch, hidden_dim) input embedding
+        """
+        indices = puzzles.long() + self.cell_offsets  # (batch, 81) rows of the 810 table
+        table = self.input_proj.weight.t().contiguous()  # (810, hidden_dim)
+        return F.embedding_bag(indices, table, mode="sum")
+
+    def decode_output(
+        self,
+        logits: torch.Tensor,
+        puzzles: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
         """Convert output logits to predictions.
 
         Args:
             logits: Shape (batch, 810) or (batch, 81, 10)
+            puzzles: If given, shape (batch, 81); their given cells are copied
+                into the predictions instead of decoded
 
         Returns:
             Shape (batch, 81) with predicted values 0-9
         """
         batch_size = logits.shape[0]
         logits = logits.view(batch_size, self.num_cells, self.num_classes)
-        return logits.argmax(dim=-1)
+        predictions = logits.argmax(dim=-1)
+        if puzzles is not None:
+            predictions = torch.where(puzzles != 0, puzzles.long(), predictions)
+        return predictions
 
     def forward(
         self,
         puzzles: torch.Tensor,
         return_all_steps: bool = False,
         max_steps: Optional[int] = None,
+        halt_threshold: Optional[float] = None,
+        converge_steps: Optional[int] = None,
+        converge_margin: float = 0.0,
+        no_grad_recursions: int = 0,
+        activation_checkpointing: Optional[str] = None,
+        n_latent: Optional[int] = None,
     ) -> Tuple[torch.Tensor, dict]:
         """Forward pass with recursive reasoning.
 
@@ -127,6 +174,18 @@ class TRM(nn.Module):
             puzzles: Shape (batch, 81) with values 0-9
             return_all_steps: If True, return predictions at each deep step
             max_steps: Override for T_deep during inference
+            halt_threshold: If set, puzzles whose cumulative ACT halting
+                probability reaches this value stop recursing (inference only)
+            converge_steps: If set, puzzles whose decoded grid is unchanged for
+                this many consecutive deep steps stop recursing (inference only)
+            converge_margin: Minimum per-cell confidence margin (top-1 minus
+                top-2 probability) required for convergence halting
+            no_grad_recursions: Number of leading TRMBlock applications (counted
+                across all T × n_latent recursions) run without autograd, so
+                gradients only flow through the remaining recursion window
+            activation_checkpointing: Recompute TRMBlock activations in backward
+                instead of storing them, per "latent" recursion or per "deep" step
+            n_latent: Override for the latent recursions per deep step
 
         Returns:
             logits: Shape (batch, 81, 10) - final predictions
@@ -134,21 +193,32 @@ class TRM(nn.Module):
         """
         batch_size = puzzles.shape[0]
         T = max_steps if max_steps is not None else self.T_deep
+        n_latent = n_latent if n_latent is not None else self.n_latent
+        if activation_checkpointing not in (None, "latent", "deep"):
+            raise ValueError(f"Unknown activation_checkpointing: {activation_checkpointing}")
 
         # Encode input
-        x_input = self.encode_input(puzzles)  # (batch, 810)
-        h = self.input_norm(self.input_proj(x_input))  # (batch, hidden_dim)
+        h = self.input_norm(self.embed_input(puzzles))  # (batch, hidden_dim)
+
+        if halt_threshold is not None or converge_steps is not None:
+            if halt_threshold is not None and not self.use_act:
+                raise ValueError("halt_threshold requires a model built with use_act=True")
+            if return_all_steps:
+                raise ValueError("Early halting cannot be combined with return_all_steps")
+            return self._forward_early_exit(
+                h, T, halt_threshold, converge_steps, converge_margin,
+                n_latent=n_latent,
+            )
 
         # Store outputs for deep supervision
         all_logits = []
         all_halt_probs = []
         cumulative_halt = torch.zeros(batch_size, device=puzzles.device)
 
-        for t in range(T):
-            # Latent recursions within each deep step
-            for _ in range(self.n_latent):
-                h = self.trm_block(h)
-
+        deep_steps = self._deep_recursion(
+            h, T, no_grad_recursions, activation_checkpointing, n_latent
+        )
+        for t, h in enumerate(deep_steps):
             # Compute halting probability if using ACT
             if self.use_act:
                 halt_logit = self.halt_proj(h).squeeze(-1)  # (batch,)
@@ -156,66 +226,307 @@ class TRM(nn.Module):
                 all_halt_probs.append(halt_prob)
                 cumulative_halt = cumulative_halt + halt_prob * (1 - cumulative_halt)
 
-            # Output prediction at this deep step
-            h_out = self.output_norm(h)
-            logits = self.output_proj(h_out)  # (batch, 810)
-            logits = logits.view(batch_size, self.num_cells, self.num_classes)
-            all_logits.append(logits)
+            # Output prediction, skipped on intermediate steps nobody consumes
+            if return_all_steps or t == T - 1:
+                all_logits.append(self._output_head(h))
 
         # Compile info dict
         info = {
             "all_logits": all_logits if return_all_steps else None,
             "halt_probs": all_halt_probs if self.use_act else None,
             "cumulative_halt": cumulative_halt if self.use_act else None,
+            "steps": torch.full((batch_size,), T, dtype=torch.long, device=puzzles.device),
         }
 
         return all_logits[-1], info
 
+    def _deep_recursion(
+        self,
+        h: torch.Tensor,
+        T: int,
+        no_grad_recursions: int = 0,
+        activation_checkpointing: Optional[str] = None,
+        n_latent: Optional[int] = None,
+    ) -> Iterator[torch.Tensor]:
+        """Run T deep steps, yielding the hidden state after each one.
+
+        Args:
+            h: Embedded input, shape (batch, hidden_dim)
+            T: Number of deep steps
+            no_grad_recursions: Leading TRMBlock applications run without autograd
+            activation_checkpointing: None, "latent" or "deep"
+            n_latent: Latent recursions per deep step (default: self.n_latent)
+
+        Yields:
+            Hidden state after each deep step, shape (batch, hidden_dim)
+        """
+        n_latent = n_latent if n_latent is not None else self.n_latent
+        grad_enabled = torch.is_grad_enabled()
+        # Re-attached at the start of the gradient window under truncation
+        embedding = h if no_grad_recursions > 0 else None
+        for t in range(T):
+            # Latent recursions within each deep step
+            start = t * n_latent
+            if (
+                activation_checkpointing == "deep"
+                and grad_enabled
+                and start + n_latent > no_grad_recursions
+            ):
+                h = checkpoint(
+                    self._latent_recursion, h, start, no_grad_recursions, False, n_latent,
+                    embedding, use_reentrant=False,
+                )
+            else:
+                h = self._latent_recursion(
+                    h, start, no_grad_recursions,
+                    checkpoint_blocks=activation_checkpointing == "latent",
+                    n_latent=n_latent,
+                    embedding=embedding,
+                )
+            yield h
+
+    def _latent_recursion(
+        self,
+        h: torch.Tensor,
+        start: int = 0,
+        no_grad_recursions: int = 0,
+        checkpoint_blocks: bool = False,
+        n_latent: Optional[int] = None,
+        embedding: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        """Apply the shared TRMBlock n_latent times.
+
+        Args:
+            h: Shape (batch, hidden_dim)
+            start: Index of the first recursion across the whole forward pass
+            no_grad_recursions: Recursions with a lower index run without autograd
+            checkpoint_blocks: Recompute each block's activations in backward
+            n_latent: Number of applications (default: self.n_latent)
+            embedding: Embedded input; under truncation its gradient path is
+                re-attached where the gradient window starts
+
+        Returns:
+            Updated hidden state, shape (batch, hidden_dim)
+        """
+        n_latent = n_latent if n_latent is not None else self.n_latent
+        grad_enabled = torch.is_grad_enabled()
+        for i in range(n_latent):
+            # Truncated backprop: leading recursions keep no activations
+            track_grad = grad_enabled and start + i >= no_grad_recursions
+            if track_grad and embedding is not None and start + i == no_grad_recursions:
+                # Autocast caches low-precision weight copies made under
+                # no_grad in the prefix; reusing them would cut the block's
+                # weights out of the graph
+                torch.clear_autocast_cache()
+                # The embedding only enters at h0, so without this the input
+                # projection never trains; treat the truncated prefix as
+                # identity w.r.t. the embedding (one-step gradient)
+                h = h.detach() + embedding - embedding.detach()
+            with torch.set_grad_enabled(track_grad):
+                if track_grad and checkpoint_blocks:
+                    h = checkpoint(self.trm_block, h, use_reentrant=False)
+                else:
+                    h = self.trm_block(h)
+        return h
+
+    def _output_head(self, h: torch.Tensor) -> torch.Tensor:
+        """Project hidden states to per-cell logits.
+
+        Args:
+            h: Shape (batch, hidden_dim)
+
+        Returns:
+            Shape (batch, 81, 10) logits
+        """
+        logits = self.output_proj(self.output_norm(h))  # (batch, 810)
+        return logits.view(-1, self.num_cells, self.num_classes)
+
+    def _forward_early_exit(
+        self,
+        h: torch.Tensor,
+        T: int,
+        halt_threshold: Optional[float] = None,
+        converge_steps: Optional[int] = None,
+        converge_margin: float = 0.0,
+        n_latent: Optional[int] = None,
+    ) -> Tuple[torch.Tensor, dict]:
+        """Deep recursion that drops finished puzzles from the active batch.
+
+        After each deep step a row is finished if its cumulative ACT halting
+        probability has reached ``halt_threshold``, or if its decoded grid has
+        been identical for ``converge_steps`` consecutive deep steps with every
+        cell's confidence margin at least ``converge_margin``. Finished rows are
+        removed, so only unfinished puzzles keep paying for latent recursions.
+        Each row's logits from the step it finished at are scattered back into
+        the full-batch output.
+
+        Args:
+            h: Embedded input, shape (batch, hidden_dim)
+            T: Maximum number of deep steps
+            halt_threshold: Cumulative halting probability that stops a row
+            converge_steps: Consecutive unchanged deep steps that stop a row
+            converge_margin: Minimum top-1 minus top-2 probability over cells
+            n_latent: Latent recursions per deep step (default: self.n_latent)
+
+        Returns:
+            logits: Shape (batch, 81, 10) - predictions at each row's final step
+            info: Dict with per-sample cumulative halting and step counts
+        """
+        batch_size = h.shape[0]
+        device = h.device
+
+        final_logits = None
+        cumulative_halt = torch.zeros(batch_size, device=device)
+        steps = torch.full((batch_size,), T, dtype=torch.long, device=device)
+        active = torch.arange(batch_size, device=device)
+        active_halt = cumulative_halt
+        prev_preds = None
+        stable_steps = torch.zeros(batch_size, dtype=torch.long, device=device)
+
+        n_latent = n_latent if n_latent is not None else self.n_latent
+        for t in range(T):
+            for _ in range(n_latent):
+                h = self.trm_block(h)
+
+            # Convergence needs every active row's prediction; ACT alone only
+            # needs logits for rows that stop at this step
+            logits = None
+            if converge_steps is not None or t == T - 1:
+                logits = self._output_head(h)
+                if final_logits is None:
+                    final_logits = logits.new_empty(batch_size, self.num_cells, self.num_classes)
+                final_logits[active] = logits
+
+            halted = torch.zeros(active.shape[0], dtype=torch.bool, device=device)
+
+            if self.use_act and halt_threshold is not None:
+                halt_prob = torch.sigmoid(self.halt_proj(h).squeeze(-1))
+                active_halt = active_halt + halt_prob * (1 - active_halt)
+                cumulative_halt[active] = active_halt.to(cumulative_halt.dtype)
+                halted |= active_halt >= halt_threshold
+
+            if t == T - 1:
+                break
+
+            if converge_steps is not None:
+                preds = self.decode_output(logits)
+                if prev_preds is None:
+                    stable_steps = torch.ones_like(stable_steps)
+                else:
+                    unchanged = (preds == prev_preds).all(dim=-1)
+                    stable_steps = torch.where(unchanged, stable_steps + 1, 1)
+                top2 = logits.float().softmax(dim=-1).topk(2, dim=-1).values
+                margin = (top2[..., 0] - top2[..., 1]).amin(dim=-1)
+                halted |= (stable_steps >= converge_steps) & (margin >= converge_margin)
+                prev_preds = preds
+
+            # Compact the batch down to the rows that have not finished yet
+            if halted.any():
+                if logits is None:
+                    halted_logits = self._output_head(h[halted])
+                    if final_logits is None:
+                        final_logits = halted_logits.new_empty(
+                            batch_size, self.num_cells, self.num_classes
+                        )
+                    final_logits[active[halted]] = halted_logits
+                steps[active[halted]] = t + 1
+                keep = ~halted
+                active = active[keep]
+                active_halt = active_halt[keep]
+                h = h[keep]
+                if prev_preds is not None:
+                    prev_preds = prev_preds[keep]
+                    stable_steps = stable_steps[keep]
+                if active.numel() == 0:
+                    break
+
+        info = {
+            "all_logits": None,
+            "halt_probs": None,
+            "cumulative_halt": cumulative_halt if halt_threshold is not None else None,
+            "steps": steps,
+        }
+
+        return final_logits, info
+
     def forward_with_supervision(
         self,
         puzzles: torch.Tensor,
         solutions: torch.Tensor,
+        loss_mask: Optional[torch.Tensor] = None,
+        no_grad_recursions: int = 0,
+        activation_checkpointing: Optional[str] = None,
     ) -> Tuple[torch.Tensor, torch.Tensor, dict]:
         """Forward pass returning loss components for training.
 
         Args:
             puzzles: Shape (batch, 81) with values 0-9 (0 = empty)
             solutions: Shape (batch, 81) with values 1-9 (ground truth)
+            loss_mask: Optional (batch, 81) bool mask of cells that contribute
+                to the CE loss, e.g. ``puzzles == 0`` to skip given cells
+            no_grad_recursions: Leading TRMBlock applications run without
+                autograd (truncated backprop through the recursion)
+            activation_checkpointing: "latent" or "deep" to recompute TRMBlock
+                activations in backward instead of storing them
 
         Returns:
             total_loss: Combined loss for backprop
             logits: Final predictions (batch, 81, 10)
             info: Dict with loss components and metrics
         """
-        logits, info = self.forward(puzzles, return_all_steps=True)
-        all_logits = info["all_logits"]
+        if activation_checkpointing not in (None, "latent", "deep"):
+            raise ValueError(f"Unknown activation_checkpointing: {activation_checkpointing}")
+
+        h = self.input_norm(self.embed_input(puzzles))
 
-        # Deep supervision loss: CE at each step with equal weight
+        # Reshape for cross entropy: (batch*81, 10) vs (batch*81,)
+        targets = solutions.reshape(-1)
+        cell_index = None
+        if loss_mask is not None:
+            cell_index = loss_mask.reshape(-1).nonzero().squeeze(1)
+            targets = targets.index_select(0, cell_index)
+
+        # Deep supervision loss: CE at each step with equal weight, computed as
+        # soon as the step's logits exist so they can be released right away
         ce_losses = []
-        for step_logits in all_logits:
-            # Reshape for cross entropy: (batch*81, 10) vs (batch*81,)
-            step_logits_flat = step_logits.view(-1, self.num_classes)
-            solutions_flat = solutions.view(-1)
-            ce = F.cross_entropy(step_logits_flat, solutions_flat)
-            ce_losses.append(ce)
+        all_halt_probs = []
+        cumulative_halt = torch.zeros(puzzles.shape[0], device=puzzles.device)
+
+        deep_steps = self._deep_recursion(
+            h, self.T_deep, no_grad_recursions, activation_checkpointing
+        )
+        for h in deep_steps:
+            if self.use_act:
+                halt_prob = torch.sigmoid(self.halt_proj(h).squeeze(-1))
+                all_halt_probs.append(halt_prob)
+                cumulative_halt = cumulative_halt + halt_prob * (1 - cumulative_halt)
+
+            logits = self._output_head(h)
+            step_logits_flat = logits.view(-1, self.num_classes)
+            if cell_index is not None:
+                step_logits_flat = step_logits_flat.index_select(0, cell_index)
+            ce_losses.append(F.cross_entropy(step_logits_flat, targets))
 
         # Average CE across deep steps
         ce_loss = torch.stack(ce_losses).mean()
 
         # ACT loss: encourage halting (penalize not halting)
         act_loss = torch.tensor(0.0, device=puzzles.device)
-        if self.use_act and info["halt_probs"]:
+        if self.use_act and all_halt_probs:
             # Penalize remaining probability mass (encourage early halting)
-            remaining = 1.0 - info["cumulative_halt"]
+            remaining = 1.0 - cumulative_halt
             act_loss = remaining.mean() * 0.01  # Small weight
 
         total_loss = ce_loss + act_loss
 
-        info.update({
+        info = {
+            "all_logits": None,
+            "halt_probs": all_halt_probs if self.use_act else None,
+            "cumulative_halt": cumulative_halt if self.use_act else None,
             "ce_loss": ce_loss,
             "act_loss": act_loss,
             "ce_losses_per_step": ce_losses,
-        })
+        }
 
         return total_loss, logits, info
 
@@ -0,0 +1,119 @@
+"""Per-machine CPU inference settings written by the autotuner.
+
+``scripts/autotune.py`` benchmarks thread counts, batch sizes and worker
+processes and stores the best configuration here, keyed by a machine
+fingerprint (CPU model and core count) so one file can be shared by
+different node types. evaluate/solve/serve use the stored values for any
+setting not given on the command line.
+
+The file defaults to ~/.cache/trm/tuning.json and can be moved with the
+TRM_TUNING_FILE environment variable. Importing this module does not
+import torch.
+"""
+
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_TUNING_FILE = Path.home() / ".cache" / "trm" / "tuning.json"
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def tuning_file() -> Path:
+    """Location of the tuning file."""
+    return Path(os.environ.get("TRM_TUNING_FILE", DEFAULT_TUNING_FILE)).expanduser()
+
+
+def machine_fingerprint() -> str:
+    """Identify the node type: architecture, CPU model and usable cores."""
+    cpu_model = platform.processor() or "unknown"
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu_model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{platform.machine()}|{cpu_model}|{available_cores()} cores"
+
+
+def load_tuning(path: Optional[str] = None) -> Dict[str, Any]:
+    """Tuned settings for this machine ({} if it has not been tuned)."""
+    path = Path(path) if path else tuning_file()
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        entries = json.load(f)
+    return entries.get(machine_fingerprint(), {})
+
+
+def save_tuning(settings: Dict[str, Any], path: Optional[str] = None) -> Path:
+    """Store settings for this machine, keeping other machines' entries."""
+    path = Path(path) if path else tuning_file()
+    entries = {}
+    if path.exists():
+        with open(path) as f:
+            entries = json.load(f)
+    entries[machine_fingerprint()] = settings
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(entries, f, indent=2)
+    return path
+
+
+def apply_threads(num_threads: Optional[int] = None, num_interop_threads: Optional[int] = None):
+    """Set torch thread pools; call before the first torch operation.
+
+    Args:
+        num_threads: Intra-op threads (None leaves torch's default)
+        num_interop_threads: Inter-op threads (None leaves torch's default)
+    """
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Can only be set once, before any inter-op parallel work
+            pass
+
+
+def resolve_settings(
+    cli: Dict[str, Any],
+    defaults: Dict[str, Any],
+    use_tuning: bool = True,
+) -> Dict[str, Any]:
+    """Merge settings: command-line values, then tuned values, then defaults.
+
+    Args:
+        cli: Setting -> command-line value (None when not given)
+        defaults: Setting -> fallback value
+        use_tuning: Consult the tuning file (False e.g. for GPU runs)
+
+    Returns:
+        Setting -> value to use
+    """
+    tuned = load_tuning() if use_tuning else {}
+    settings, applied = {}, {}
+    for key, value in cli.items():
+        if value is None and key in tuned:
+            value = applied[key] = tuned[key]
+        elif value is None:
+            value = defaults.get(key)
+        settings[key] = value
+    if applied:
+        print(f"Using tuned settings from {tuning_file()}: {applied}", file=sys.stderr)
+    return settings
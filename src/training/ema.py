@@ -9,6 +9,8 @@ import torch.nn as nn
 from typing import Optional
 from copy import deepcopy
 
+from ..model.layers import fuse_swiglu_state_dict
+
 
 class EMA:
     """Exponential Moving Average of model parameters.
@@ -108,8 +110,13 @@ class EMA:
         self.decay = state_dict["decay"]
         self.warmup_steps = state_dict["warmup_steps"]
 
+        shadow = state_dict["shadow"]
+        if any(name.endswith("w13.weight") for name in self.shadow):
+            # Tracked model uses fused SwiGLU; convert unfused checkpoints
+            shadow = fuse_swiglu_state_dict(dict(shadow))
+
         device = next(self.model.parameters()).device
-        for name, value in state_dict["shadow"].items():
+        for name, value in shadow.items():
             if name in self.shadow:
                 self.shadow[name] = value.to(device)
 
@@ -3,6 +3,7 @@
 import os
 import time
 import json
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, Optional, Any
 from dataclasses import dataclass, asdict
@@ -14,6 +15,8 @@ from torch.amp import GradScaler, autocast
 from tqdm import tqdm
 
 from ..model.trm import TRM
+from ..model.compile import compile_model
+from ..data.batch_augmentation import TorchBatchAugmentor
 from .ema import EMA
 
 
@@ -25,6 +28,7 @@ class TrainingConfig:
     n_latent: int = 6
     T_deep: int = 3
     use_act: bool = True
+    fused_swiglu: bool = False
 
     # Training
     epochs: int = 200
@@ -33,6 +37,18 @@ class TrainingConfig:
     weight_decay: float = 1.0
     warmup_steps: int = 200
     max_grad_norm: float = 1.0
+    loss_on_empty_cells: bool = False  # Skip given cells in the CE loss
+
+    # Truncated backprop: leading recursions run under no_grad
+    no_grad_deep_steps: int = 0
+    no_grad_latent_steps: int = 0
+
+    # Activation checkpointing of the shared TRMBlock ("latent" or "deep")
+    activation_checkpointing: bool = False
+    checkpoint_granularity: str = "latent"
+
+    # torch.compile the shared TRMBlock
+    compile: bool = False
 
     # Early stopping
     early_stopping: bool = True
@@ -45,11 +61,13 @@ class TrainingConfig:
 
     # Mixed precision
     use_amp: bool = True
-    amp_dtype: str = "float16"
+    amp_dtype: str = "float16"  # CUDA only; CPU autocast always uses bfloat16
 
     # Data
     train_samples: int = 1000
     augmentations_per_sample: int = 200
+    augment_on_batch: bool = False  # Augment raw batches with torch ops in train_step
+    augment_seed: int = 42
 
     # Logging and checkpointing
     log_interval: int = 24
@@ -119,12 +137,43 @@ class TRMTrainer:
         config: Optional[TrainingConfig] = None,
     ):
         self.config = config or TrainingConfig()
-        self.device = torch.device(self.config.device if torch.cuda.is_available() else "cpu")
+        self.device = torch.device(self.config.device)
+        if self.device.type == "cuda" and not torch.cuda.is_available():
+            print("CUDA not available, training on CPU")
+            self.device = torch.device("cpu")
 
         self.model = model.to(self.device)
+        if self.config.compile:
+            compile_model(self.model, dynamic=None)
         self.train_loader = train_loader
         self.val_loader = val_loader
 
+        # On-device augmentation of raw base puzzles (the loader must not augment)
+        self.batch_augmentor = None
+        if self.config.augment_on_batch:
+            self.batch_augmentor = TorchBatchAugmentor(self.config.augment_seed, self.device)
+
+        # Truncated backprop window, counted in TRMBlock applications
+        self.no_grad_recursions = (
+            self.config.no_grad_deep_steps * self.config.n_latent
+            + self.config.no_grad_latent_steps
+        )
+        if self.no_grad_recursions >= self.config.T_deep * self.config.n_latent:
+            raise ValueError(
+                f"Truncated backprop leaves no recursion with gradients "
+                f"({self.no_grad_recursions} of {self.config.T_deep * self.config.n_latent} under no_grad)"
+            )
+
+        # Activation checkpointing granularity passed to the model
+        self.activation_checkpointing = None
+        if self.config.activation_checkpointing:
+            if self.config.checkpoint_granularity not in ("latent", "deep"):
+                raise ValueError(
+                    f"checkpoint_granularity must be 'latent' or 'deep', "
+                    f"got {self.config.checkpoint_granularity!r}"
+                )
+            self.activation_checkpointing = self.config.checkpoint_granularity
+
         # Optimizer with weight decay
         self.optimizer = torch.optim.AdamW(
             self.model.parameters(),
@@ -143,9 +192,16 @@ class TRMTrainer:
             warmup_steps=self.config.ema_warmup_steps,
         )
 
-        # Mixed precision
-        self.scaler = GradScaler("cuda") if self.config.use_amp else None
-        self.amp_dtype = getattr(torch, self.config.amp_dtype, torch.float32)
+        # Mixed precision: fp16 + loss scaling on CUDA, bf16 (no scaler) on CPU
+        self.amp_dtype = None
+        if self.config.use_amp:
+            if self.device.type == "cuda":
+                self.amp_dtype = getattr(torch, self.config.amp_dtype, torch.float16)
+            elif self.device.type == "cpu":
+                self.amp_dtype = torch.bfloat16
+            else:
+                print(f"Mixed precision not supported on {self.device.type}, using float32")
+        self.scaler = GradScaler("cuda") if self.amp_dtype == torch.float16 else None
 
         # Early stopping
         self.early_stopping = None
@@ -178,26 +234,45 @@ class TRMTrainer:
 
         return torch.optim.lr_scheduler.LambdaLR(self.optimizer, lr_lambda)
 
+    def _loss_mask(self, puzzles: torch.Tensor) -> Optional[torch.Tensor]:
+        """Cells that contribute to the CE loss (None = all cells)."""
+        if self.config.loss_on_empty_cells:
+            return puzzles == 0
+        return None
+
+    def _autocast(self):
+        """Autocast context for the trainer's device (no-op without AMP)."""
+        if self.amp_dtype is None:
+            return nullcontext()
+        return autocast(self.device.type, dtype=self.amp_dtype)
+
     def train_step(self, batch: Dict[str, torch.Tensor]) -> Dict[str, float]:
         """Single training step."""
         self.model.train()
 
         puzzles = batch["puzzle"].to(self.device)
         solutions = batch["solution"].to(self.device)
+        if self.batch_augmentor is not None:
+            puzzles, solutions = self.batch_augmentor(puzzles, solutions)
 
         self.optimizer.zero_grad()
 
-        if self.config.use_amp:
-            with autocast("cuda", dtype=self.amp_dtype):
-                loss, logits, info = self.model.forward_with_supervision(puzzles, solutions)
+        with self._autocast():
+            loss, logits, info = self.model.forward_with_supervision(
+                puzzles,
+                solutions,
+                loss_mask=self._loss_mask(puzzles),
+                no_grad_recursions=self.no_grad_recursions,
+                activation_checkpointing=self.activation_checkpointing,
+            )
 
+        if self.scaler is not None:
             self.scaler.scale(loss).backward()
             self.scaler.unscale_(self.optimizer)
             torch.nn.utils.clip_grad_norm_(self.model.parameters(), self.config.max_grad_norm)
             self.scaler.step(self.optimizer)
             self.scaler.update()
         else:
-            loss, logits, info = self.model.forward_with_supervision(puzzles, solutions)
             loss.backward()
             torch.nn.utils.clip_grad_norm_(self.model.parameters(), self.config.max_grad_norm)
             self.optimizer.step()
@@ -221,6 +296,83 @@ class TRMTrainer:
             "lr": self.scheduler.get_last_lr()[0],
         }
 
+    def _saved_activation_bytes(
+        self,
+        activation_checkpointing: Optional[str],
+        probe_size: int = 64,
+    ) -> int:
+        """Measure bytes autograd keeps for backward on a random probe batch.
+
+        Parameters saved by reference are excluded, so the result is the
+        activation memory of one training forward pass (under the training
+        autocast, so AMP runs save low-precision activations as they do here).
+        """
+        param_storages = {p.untyped_storage().data_ptr() for p in self.model.parameters()}
+        saved_storages = {}
+
+        def pack(tensor):
+            storage = tensor.untyped_storage()
+            if storage.data_ptr() not in param_storages:
+                saved_storages[storage.data_ptr()] = storage.nbytes()
+            return tensor
+
+        puzzles = torch.randint(0, 10, (probe_size, 81), device=self.device)
+        solutions = torch.randint(1, 10, (probe_size, 81), device=self.device)
+
+        self.model.train()
+        with self._autocast(), torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+            loss, _, _ = self.model.forward_with_supervision(
+                puzzles,
+                solutions,
+                loss_mask=self._loss_mask(puzzles),
+                no_grad_recursions=self.no_grad_recursions,
+                activation_checkpointing=activation_checkpointing,
+            )
+        del loss
+        return sum(saved_storages.values())
+
+    def _peak_step_bytes(self, activation_checkpointing: Optional[str]) -> int:
+        """Peak CUDA memory of one forward and backward pass at the training batch size.
+
+        Runs on a random batch without stepping the optimizer, scheduler or
+        EMA; gradients are cleared again afterwards.
+        """
+        puzzles = torch.randint(0, 10, (self.config.batch_size, 81), device=self.device)
+        solutions = torch.randint(1, 10, (self.config.batch_size, 81), device=self.device)
+
+        self.model.train()
+        self.model.zero_grad(set_to_none=True)
+        torch.cuda.reset_peak_memory_stats(self.device)
+        with self._autocast():
+            loss, _, _ = self.model.forward_with_supervision(
+                puzzles,
+                solutions,
+                loss_mask=self._loss_mask(puzzles),
+                no_grad_recursions=self.no_grad_recursions,
+                activation_checkpointing=activation_checkpointing,
+            )
+        loss.backward()
+        peak = torch.cuda.max_memory_allocated(self.device)
+        del loss
+        self.model.zero_grad(set_to_none=True)
+        torch.cuda.reset_peak_memory_stats(self.device)
+        return peak
+
+    def _report_activation_memory(self, probe_size: int = 64):
+        """Log activation memory with and without activation checkpointing."""
+        scale = self.config.batch_size / probe_size
+        baseline = self._saved_activation_bytes(None, probe_size) * scale
+        checkpointed = self._saved_activation_bytes(self.activation_checkpointing, probe_size) * scale
+        saving = 1 - checkpointed / baseline if baseline else 0.0
+        print(f"Activation checkpointing ({self.activation_checkpointing}): "
+              f"~{checkpointed / 2**20:.0f} MiB saved activations per batch "
+              f"vs ~{baseline / 2**20:.0f} MiB without ({saving:.0%} less)")
+        if self.device.type == "cuda":
+            baseline_peak = self._peak_step_bytes(None)
+            checkpointed_peak = self._peak_step_bytes(self.activation_checkpointing)
+            print(f"Peak GPU memory per training step: {checkpointed_peak / 2**20:.0f} MiB "
+                  f"vs {baseline_peak / 2**20:.0f} MiB without checkpointing")
+
     @torch.no_grad()
     def evaluate(self, loader: Optional[DataLoader] = None) -> Dict[str, float]:
         """Evaluate model on validation set using EMA weights."""
@@ -240,11 +392,10 @@ class TRMTrainer:
                 puzzles = batch["puzzle"].to(self.device)
                 solutions = batch["solution"].to(self.device)
 
-                if self.config.use_amp:
-                    with autocast("cuda", dtype=self.amp_dtype):
-                        loss, logits, _ = self.model.forward_with_supervision(puzzles, solutions)
-                else:
-                    loss, logits, _ = self.model.forward_with_supervision(puzzles, solutions)
+                with self._autocast():
+                    loss, logits, _ = self.model.forward_with_supervision(
+                        puzzles, solutions, loss_mask=self._loss_mask(puzzles)
+                    )
 
                 preds = logits.argmax(dim=-1)
 
@@ -263,6 +414,9 @@ class TRMTrainer:
     def train(self) -> Dict[str, Any]:
         """Main training loop with early stopping."""
         print(f"Starting training on {self.device}")
+        if self.amp_dtype is not None:
+            scaling = " with loss scaling" if self.scaler is not None else ""
+            print(f"Mixed precision: {self.device.type} autocast to {self.amp_dtype}{scaling}")
         print(f"Model parameters: {self.model.count_parameters():,}")
         print(f"Training samples: {len(self.train_loader.dataset):,}")
         print(f"Batch size: {self.config.batch_size}")
@@ -271,6 +425,12 @@ class TRMTrainer:
         if self.early_stopping:
             print(f"Early stopping: patience={self.config.early_stopping_patience}, "
                   f"min_delta={self.config.early_stopping_min_delta}")
+        if self.no_grad_recursions:
+            total = self.config.T_deep * self.config.n_latent
+            print(f"Truncated backprop: gradients through last "
+                  f"{total - self.no_grad_recursions}/{total} recursions")
+        if self.activation_checkpointing:
+            self._report_activation_memory()
 
         # Save config
         config_path = self.output_dir / "config.json"
@@ -290,6 +450,9 @@ class TRMTrainer:
             pbar = tqdm(self.train_loader, desc=f"Epoch {epoch+1}/{self.config.epochs}")
             for batch in pbar:
                 metrics = self.train_step(batch)
+                if self.global_step == 1 and self.device.type == "cuda":
+                    peak = torch.cuda.max_memory_allocated(self.device)
+                    print(f"\nPeak GPU memory after first step: {peak / 2**20:.0f} MiB")
                 running_loss = 0.9 * running_loss + 0.1 * metrics["loss"]
                 running_acc = 0.9 * running_acc + 0.1 * metrics["puzzle_acc"]
                 epoch_loss += metrics["loss"]